@@ -6,6 +6,7 @@ import logging
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
 from scipy.sparse import hstack
+import hashlib
 import re
 import os
 from lxml import html as lxml_html, etree
@@ -17,6 +18,7 @@ logging.basicConfig(level=logging.INFO)
 # ---------- Completely generic helpers ----------
 _CAMEL_RE = re.compile(r"([a-z])([A-Z])")
 _NONWORD_SPLIT = re.compile(r"[^a-z0-9]+", re.I)
+_CORPUS_CACHE_SIZE = 4
 
 def _normalize_text(s: str) -> str:
     """Simple text normalization - no hardcoded stop words."""
@@ -173,12 +175,15 @@ def _build_weighted_vectors(docs: List[str], intent_str: str, locator_tokens: st
     
     return X[:-1], X[-1]
 
-def _calculate_intent_boost(el: Tag, intent_str: str, locator_tokens: str) -> float:
+def _calculate_intent_boost(
+    el: Tag, intent_str: str, locator_tokens: str, element_text: str = None
+) -> float:
     """Calculate additional boost based on intent matching."""
     boost = 0.0
     
     # Get element text
-    element_text = _element_to_text(el)
+    if element_text is None:
+        element_text = _element_to_text(el)
     intent_normalized = _normalize_text(intent_str)
     locator_words = locator_tokens.split()
     
@@ -223,36 +228,41 @@ def _calculate_intent_boost(el: Tag, intent_str: str, locator_tokens: str) -> fl
 class IntentLocatorLibrary:
     """Completely generic library with proper intent weighting."""
 
-    def find_elements_outerhtml_by_intent(
-        self,
-        html_or_path: str,
-        intent_str: str,
-        top_k: int = 5,
-        min_score: float = 0.0,
-        locator_value: str = "",
-    ) -> List[str]:
+    def __init__(self):
+        # Parsed pages keyed by content hash, so steps against the same DOM
+        # skip re-parsing and re-tokenizing it
+        self._corpus_cache = {}
+
+    def set_corpus(self, html_or_path: str):
         """
-        Generic approach with proper intent weighting:
-        1. Try to match elements using locator_value
-        2. Weight intent_str much more heavily than locator tokens
-        3. Add boosts for exact attribute matches
-        4. Return outerHTML of top scoring elements
+        Parse the page once and keep it for later queries.
+        Returns (html, soup, elements, docs).
         """
-        top_k = int(top_k)
-        min_score = float(min_score)
-
         html = _read_html(html_or_path)
-        soup = BeautifulSoup(html, "lxml")
-        elements = soup.find_all(True)
+        key = hashlib.blake2b(html.encode("utf-8", "ignore")).digest()
+        corpus = self._corpus_cache.get(key)
+        if corpus is None:
+            soup = BeautifulSoup(html, "lxml")
+            elements = soup.find_all(True)
+            docs = [_element_to_text(el) for el in elements]
+            corpus = (html, soup, elements, docs)
+            if len(self._corpus_cache) >= _CORPUS_CACHE_SIZE:
+                self._corpus_cache.pop(next(iter(self._corpus_cache)))
+            self._corpus_cache[key] = corpus
+        return corpus
+
+    def query(self, html_or_path: str, intent_str: str, locator_value: str = ""):
+        """
+        Score every element of the (cached) page against the intent.
+        Returns (elements, scored) with scored sorted by score, highest first.
+        """
+        html, soup, elements, docs = self.set_corpus(html_or_path)
 
         # Try to match elements using locator value
         matched_sigs, _, has_locator_matches = _try_locator_match(html, soup, locator_value)
         
         # Extract tokens from locator value
         locator_tokens = _extract_all_tokens(locator_value)
-        
-        # Convert elements to text for matching
-        docs = [_element_to_text(el) for el in elements]
 
         # Build weighted vectors with intent priority
         elem_vecs, q_vec = _build_weighted_vectors(docs, intent_str, locator_tokens)
@@ -268,15 +278,40 @@ class IntentLocatorLibrary:
                 score += 0.1
             
             # Add intent-based boosting
-            intent_boost = _calculate_intent_boost(el, intent_str, locator_tokens)
+            intent_boost = _calculate_intent_boost(
+                el, intent_str, locator_tokens, docs[idx]
+            )
             score += intent_boost
             
             scored.append((score, idx))
 
         # Sort by score
         scored.sort(key=lambda x: x[0], reverse=True)
+        return elements, scored
+
+    def find_elements_outerhtml_by_intent(
+        self,
+        html_or_path: str,
+        intent_str: str,
+        top_k: int = 5,
+        min_score: float = 0.0,
+        locator_value: str = "",
+    ) -> List[str]:
+        """
+        Generic approach with proper intent weighting:
+        1. Try to match elements using locator_value
+        2. Weight intent_str much more heavily than locator tokens
+        3. Add boosts for exact attribute matches
+        4. Return outerHTML of top scoring elements
+        """
+        top_k = int(top_k)
+        min_score = float(min_score)
 
-        # Return top results
+        elements, scored = self.query(html_or_path, intent_str, locator_value)
+        return self._outerhtml_results(elements, scored, top_k, min_score)
+
+    def _outerhtml_results(self, elements, scored, top_k: int, min_score: float):
+        """Return outerHTML of the top scored elements above min_score."""
         results = []
         for score, idx in scored[:top_k]:
             if score >= min_score:
@@ -298,30 +333,11 @@ class IntentLocatorLibrary:
         top_k = int(top_k)
         min_score = float(min_score)
 
-        html = _read_html(html_or_path)
-        soup = BeautifulSoup(html, "lxml")
-        elements = soup.find_all(True)
-
-        matched_sigs, _, has_locator_matches = _try_locator_match(html, soup, locator_value)
-        locator_tokens = _extract_all_tokens(locator_value)
-
-        docs = [_element_to_text(el) for el in elements]
-        elem_vecs, q_vec = _build_weighted_vectors(docs, intent_str, locator_tokens)
-        sims = linear_kernel(q_vec, elem_vecs).flatten()
-
-        scored = []
-        for idx, el in enumerate(elements):
-            score = float(sims[idx])
-            if _signature_from_bs4(el) in matched_sigs:
-                score += 0.1
-            
-            intent_boost = _calculate_intent_boost(el, intent_str, locator_tokens)
-            score += intent_boost
-            
-            scored.append((score, idx))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
+        elements, scored = self.query(html_or_path, intent_str, locator_value)
+        return self._ranked_results(elements, scored, top_k, min_score)
 
+    def _ranked_results(self, elements, scored, top_k: int, min_score: float):
+        """Return ranking rows for the top scored elements above min_score."""
         results = []
         for score, idx in scored[:top_k]:
             if score < min_score:
@@ -356,12 +372,13 @@ class IntentLocatorLibrary:
         min_floor = float(min_floor)
         step = abs(float(step))
 
+        # Scores don't depend on the threshold, so compute them once
+        elements, scored = self.query(html_or_path, intent_str, locator_value)
+
         thr = start
         last = []
         while thr + 1e-9 >= min_floor:
-            matches = self.find_elements_outerhtml_by_intent(
-                html_or_path, intent_str, top_k=top_k, min_score=thr, locator_value=locator_value
-            )
+            matches = self._outerhtml_results(elements, scored, top_k, thr)
             logger.info(f"[IntentLocator] backoff try min_score={thr}: {len(matches)} match(es)")
             if matches:
                 return matches
@@ -385,12 +402,12 @@ class IntentLocatorLibrary:
         min_floor = float(min_floor)
         step = abs(float(step))
 
+        elements, scored = self.query(html_or_path, intent_str, locator_value)
+
         thr = start
         last = []
         while thr + 1e-9 >= min_floor:
-            ranked = self.rank_elements_by_intent(
-                html_or_path, intent_str, top_k=top_k, min_score=thr, locator_value=locator_value
-            )
+            ranked = self._ranked_results(elements, scored, top_k, thr)
             logger.info(f"[IntentLocator] backoff try min_score={thr}: {len(ranked)} row(s)")
             if ranked:
                 return ranked
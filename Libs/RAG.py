@@ -1,8 +1,10 @@
+import hashlib
 import numpy as np
 import os
 from dotenv import load_dotenv
 import ollama
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from chromadb import PersistentClient
 
 # Import centralized logger
@@ -14,16 +16,27 @@ llama3 = os.getenv("LLAMA3")
 llama3_url = os.getenv("LLAMA3_URL")
 os.environ["OLLAMA_HOST"] = llama3_url
 
+# Concurrent embedding requests per batch (Ollama's default OLLAMA_NUM_PARALLEL)
+_EMBED_WORKERS = 4
+
 
 class Rag:
     def __init__(self):
         class OllamaEmbeddingFunction:
             def __call__(self, input: list[str]) -> list[list[float]]:
-                return [
-                    ollama.embeddings(model="mxbai-embed-large", prompt=text)[
-                        "embedding"
-                    ]
-                    for text in input
+                if len(input) <= 1:
+                    return [self._embed(text) for text in input]
+                # Chroma hands over whole batches; overlap the per-text
+                # requests instead of paying each round trip in turn
+                with ThreadPoolExecutor(
+                    max_workers=min(_EMBED_WORKERS, len(input))
+                ) as pool:
+                    return list(pool.map(self._embed, input))
+
+            @staticmethod
+            def _embed(text: str) -> list[float]:
+                return ollama.embeddings(model="mxbai-embed-large", prompt=text)[
+                    "embedding"
                 ]
 
             def name(self):
@@ -705,12 +718,9 @@ class Rag:
     # Additional helper methods for backwards compatibility...
     def save_to_memory(self, user_idea, model_reply, collection, tag=None):
         try:
-            user_embedding = ollama.embeddings(
-                model="mxbai-embed-large", prompt=user_idea
-            )["embedding"]
-            model_embedding = ollama.embeddings(
-                model="mxbai-embed-large", prompt=model_reply
-            )["embedding"]
+            user_embedding, model_embedding = self.embedding_fn(
+                [user_idea, model_reply]
+            )
 
             base_tag = tag.replace(" ", "_") if tag else "conversation"
             uid = np.random.randint(10000)
@@ -760,16 +770,25 @@ class Rag:
     -- Purpose: {user_intent}
     {sql_query}"""
 
+            # Stable ID from the block content: the same lesson saved again
+            # is skipped instead of stored (and embedded) as a duplicate
+            base_tag = tag.lower().replace(" ", "_")
+            digest = hashlib.blake2b(formatted_block.encode("utf-8"), digest_size=8)
+            uid = int.from_bytes(digest.digest()[:4], "big")
+            block_id = f"general_{base_tag}_{digest.hexdigest()}"
+
+            try:
+                if collection.get(ids=[block_id], include=[]).get("ids"):
+                    log.safe_print(f"[Skip] Learning block already saved: {block_id}")
+                    return block_id
+            except Exception:
+                pass  # Fall through to add
+
             # Generate embedding for the formatted block
             learning_embedding = ollama.embeddings(
                 model="mxbai-embed-large", prompt=formatted_block
             )["embedding"]
 
-            # Create unique ID
-            base_tag = tag.lower().replace(" ", "_")
-            uid = np.random.randint(10000)
-            block_id = f"general_{base_tag}_{uid}"
-
             # Create metadata matching existing structure
             metadata = {
                 "label": "general",
@@ -1788,9 +1807,17 @@ Tables: {', '.join(tables_used)}"""
         if error_message and not is_correct:
             doc_content += f"\nError: {error_message}"
 
-        # Generate unique ID based on intent and query hash
-        hash_input = f"{intent}_{query}_{datetime.now().isoformat()}"
-        doc_id = f"learning_{hashlib.md5(hash_input.encode()).hexdigest()[:12]}"
+        # Stable ID from status + intent + query, so re-learning the same
+        # result doesn't add a duplicate document on every run
+        hash_input = f"{status_tag}\0{intent}\0{query}".encode()
+        doc_id = f"learning_{hashlib.blake2b(hash_input, digest_size=8).hexdigest()}"
+
+        try:
+            if db_collection.get(ids=[doc_id], include=[]).get("ids"):
+                log.safe_print(f"[[OK]] Learning document already stored: {doc_id}")
+                return doc_id
+        except Exception:
+            pass  # Fall through to add
 
         metadata = {
             "type": "learning",
@@ -1976,7 +2003,43 @@ def _rag_extract_module_from_url(self, url: str) -> str:
         return "unknown"
 
 
-def _rag_retrieve_ui_action_for_intent(self, module: str, intent: str) -> dict:
+def _rag_embed_ui_intent_queries(self, module: str, intents: list) -> dict:
+    """
+    Embed the retrieval queries for several step intents in one batch.
+
+    The vectors match what retrieve_ui_action_for_intent would embed for the
+    same module, so a scenario pays one embedding batch instead of one
+    round trip per step. Only the queries are precomputed; each step still
+    queries the collection as it stands when the step runs. Nothing is
+    embedded when the collection holds no actions for the module.
+
+    Returns:
+        dict mapping intent -> query embedding ({} if there is nothing to
+        match or embedding fails)
+    """
+    intents = list(dict.fromkeys(intents))
+    if not intents:
+        return {}
+
+    try:
+        collection = self.get_ui_learning_collection()
+        if not collection or not collection.get(
+            where={"module": module}, limit=1, include=[]
+        ).get("ids"):
+            return {}
+        embeddings = self.embedding_fn(
+            [f"module:{module} {intent}" for intent in intents]
+        )
+    except Exception as e:
+        log.safe_print(f"[RAG] Batch query embedding failed: {e}")
+        return {}
+
+    return dict(zip(intents, embeddings))
+
+
+def _rag_retrieve_ui_action_for_intent(
+    self, module: str, intent: str, query_embedding=None
+) -> dict:
     """
     Retrieve a matching [correct] action for the intent from ChromaDB.
     Uses TF-IDF similarity to find the best match.
@@ -1984,6 +2047,8 @@ def _rag_retrieve_ui_action_for_intent(self, module: str, intent: str) -> dict:
     Args:
         module: The module name (e.g., "inventory", "cart")
         intent: The step intent to match
+        query_embedding: Precomputed embedding of the query (see
+                         embed_ui_intent_queries); embedded here if None
 
     Returns:
         dict with:
@@ -2010,8 +2075,12 @@ def _rag_retrieve_ui_action_for_intent(self, module: str, intent: str) -> dict:
             return result
 
         # Query for documents with this module
+        if query_embedding is not None:
+            query = {"query_embeddings": [query_embedding]}
+        else:
+            query = {"query_texts": [f"module:{module} {intent}"]}
         query_results = collection.query(
-            query_texts=[f"module:{module} {intent}"],
+            **query,
             n_results=20,
             where={"module": module},
             include=["documents", "metadatas"],
@@ -2305,6 +2374,7 @@ def _rag_get_ui_module_summary(self, module: str = None) -> dict:
 # Add methods to Rag class
 Rag.get_ui_learning_collection = _rag_get_ui_learning_collection
 Rag._extract_module_from_url = _rag_extract_module_from_url
+Rag.embed_ui_intent_queries = _rag_embed_ui_intent_queries
 Rag.retrieve_ui_action_for_intent = _rag_retrieve_ui_action_for_intent
 Rag.store_ui_action_from_duo = _rag_store_ui_action_from_duo
 Rag.get_ui_module_summary = _rag_get_ui_module_summary
@@ -2434,7 +2504,9 @@ def _rag_retrieve_api_action_for_intent(self, resource: str, intent: str) -> dic
     return result
 
 
-def _rag_extract_resource_from_swagger_by_intent(self, intent: str) -> dict:
+def _rag_extract_resource_from_swagger_by_intent(
+    self, intent: str, query_embedding: list = None
+) -> dict:
     """
     Search swagger doc by intent and extract resource, method, and endpoint pattern.
 
@@ -2444,6 +2516,8 @@ def _rag_extract_resource_from_swagger_by_intent(self, intent: str) -> dict:
 
     Args:
         intent: Natural language intent (e.g., "get all books", "delete user 5")
+        query_embedding: Precomputed embedding of the intent (optional). When
+                         given, the intent is not embedded again for the query.
 
     Returns:
         dict: {
@@ -2472,8 +2546,12 @@ def _rag_extract_resource_from_swagger_by_intent(self, intent: str) -> dict:
             return result
 
         # Query by intent to find best matching endpoint
+        if query_embedding is not None:
+            query = {"query_embeddings": [query_embedding]}
+        else:
+            query = {"query_texts": [intent]}
         results = collection.query(
-            query_texts=[intent],
+            **query,
             n_results=1,  # Get best match
             include=["documents", "metadatas", "distances"],
         )
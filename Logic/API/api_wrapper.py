@@ -1,18 +1,280 @@
+import asyncio
 import requests
 import json
 import builtins
 import subprocess
-import platform
 import re
 import os
+import shlex
+import sys
+import signal
+import tempfile
+import copy
+import functools
+import hashlib
+import http.cookiejar
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from Resources.Constants import constants, endpoints, headers
 from Resources.prompts import get_api_endpoint_action_prompt
-from Utils.ai_agent import AIAgent
+from Utils.utils import json_loads, json_dumps_pretty
 
 # Import centralized logger
 from Utils.logger import FrameworkLogger as log, IntentLogger
 
+# Max chars of a payload printed when full payload logging (DEBUG) is off
+_LOG_PREVIEW_CHARS = 500
+
+# Bodies larger than this are logged raw (truncated) instead of re-indented
+_PRETTY_MAX_CHARS = 16 * 1024
+
+# Max number of built action prompts kept per APIWrapper (LRU)
+_PROMPT_CACHE_SIZE = 256
+
+# Max number of exact-intent swagger matches kept per APIWrapper (LRU)
+_RAG_CACHE_SIZE = 256
+
+# Max number of successful response analyses kept per APIWrapper (LRU + TTL)
+_ANALYSIS_CACHE_SIZE = 128
+
+# Fuzzy swagger-match cache (see APIWrapper._lookup_swagger_match)
+_SWAGGER_CACHE_SIZE = 256
+_SWAGGER_CACHE_BITS = 12
+_SWAGGER_CACHE_MIN_SIMILARITY = 0.97
+
+# Max chars of each prompt/response kept in the returned result
+# (the full text still goes to the intent log file)
+_MAX_CAPTURE = 4096
+
+# Characters shlex emits as operator tokens when they appear unquoted
+_SHELL_OPERATOR_CHARS = frozenset("();<>|&")
+
+# curl flags understood by APIWrapper._parse_curl (others fall back to curl)
+_CURL_VALUE_FLAGS = {
+    "-X": "method",
+    "--request": "method",
+    "-H": "header",
+    "--header": "header",
+    "-d": "data",
+    "--data": "data",
+    "--data-ascii": "data",
+    "--data-binary": "data-binary",
+    "--data-raw": "data-raw",
+    "--data-urlencode": "data-urlencode",
+    "-u": "user",
+    "--user": "user",
+    "--cacert": "cacert",
+    "--url": "url",
+    "-A": "user-agent",
+    "--user-agent": "user-agent",
+    "-e": "referer",
+    "--referer": "referer",
+    "-b": "cookie",
+    "--cookie": "cookie",
+    "--json": "json",
+}
+_CURL_BOOL_FLAGS = frozenset(
+    ("--insecure", "--silent", "--show-error", "--location", "--compressed", "--get")
+)
+_CURL_BOOL_SHORT = frozenset("ksSLG")
+
+# curl exit code when --max-filesize is exceeded
+_CURL_EXIT_FILESIZE = 63
+
+# Output options run_batch_curl sets per transfer itself
+_CURL_OUTPUT_FLAGS = frozenset(
+    ("-o", "--output", "-O", "--remote-name", "-w", "--write-out")
+)
+
+# Value options build_batch_curl adds to every transfer
+_CURL_BATCH_VALUE_FLAGS = frozenset(("--max-time", "--max-filesize", "-o", "-w"))
+
+# Backslash escapes understood inside double-quoted -K config values
+_CURL_CONFIG_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+
+# Markdown code fences around a generated curl command ("shell" before "sh")
+_CODE_FENCE_RE = re.compile(r"```(?:bash|shell|sh)?\s*")
+
+# -d '...' arguments rewritten by _convert_quotes_for_windows
+_SINGLE_QUOTED_DATA_RE = re.compile(r"-d\s+'([^']*)'")
+
+# The -w "\n%{http_code}" trailer curl appends after the body
+_STATUS_CODE_RE = re.compile(rb"[0-9]{3}")
+
+# Separator rules for the intent log
+_RULE100 = "=" * 100
+_RULE90 = "-" * 90
+
+# Box borders and fixed-width rows for _print_execution_summary
+_HLINE = "+" + "-" * 78 + "+"
+_DOUBLE_EQ = "=" * 80
+_BANNER_SUMMARY = " " * 20 + ">> FULL EXECUTION SUMMARY <<"
+_BANNER_PASS = " " * 25 + "[OK] TEST PASSED [OK]"
+_BANNER_FAIL = " " * 25 + "[FAIL] TEST FAILED [FAIL]"
+_FMT_ROW = "| {:<76} |".format
+_FMT_INDENTED_ROW = "|   {:<74} |".format
+_FMT_INTENT = "| Intent: {:<68} |".format
+_FMT_BASE_URL = "| Base URL: {:<66} |".format
+_FMT_RETRIES = "| Retries Used: {:<62} |".format
+_FMT_STATUS = "| Status Code: {:<63} |".format
+_FMT_SUCCESS = "| Success: {:<68} |".format
+_FMT_MORE_LINES = "... (truncated - {} more lines)".format
+
+
+def _capture(text):
+    """Truncate a prompt/response string for storage in the result dict."""
+    if not isinstance(text, str) or len(text) <= _MAX_CAPTURE:
+        return text
+    return f"{text[:_MAX_CAPTURE]}...<+{len(text) - _MAX_CAPTURE} chars>"
+
+
+def _chunks(text, width, limit):
+    """Yield at most limit consecutive width-char slices of text."""
+    for i in range(0, min(len(text), width * limit), width):
+        yield text[i : i + width]
+
+
+def _has_shell_expansion(command):
+    """
+    Check for $ or ` outside single quotes, i.e. text a shell would expand.
+
+    Escaped \\$ also counts, since the shell (not shlex) strips the backslash.
+    """
+    quote = None
+    escaped = False
+    for ch in command:
+        if escaped:
+            if ch in "$`":
+                return True
+            escaped = False
+        elif quote == "'":
+            if ch == "'":
+                quote = None
+        elif ch == "\\":
+            escaped = True
+        elif ch in "$`":
+            return True
+        elif ch == '"':
+            quote = None if quote == '"' else '"'
+        elif ch == "'" and quote is None:
+            quote = "'"
+    return False
+
+
+def _curl_flags(tokens):
+    """
+    Collect the option names used in tokenized curl arguments.
+
+    Combined short switches (-sSk) and attached values (-m5, -XPOST) are
+    split, and the values of known value flags are skipped so a body like
+    -d "-k" isn't mistaken for a flag.
+    """
+    flags = set()
+    tokens = iter(tokens)
+    for token in tokens:
+        if not token.startswith("-") or token == "-":
+            continue
+        if token in _CURL_VALUE_FLAGS:
+            flags.add(token)
+            next(tokens, None)
+        elif token[1] != "-":
+            flags.add(token[:2])
+            if set(token[2:]) <= _CURL_BOOL_SHORT:
+                flags.update(f"-{flag}" for flag in token[2:])
+        else:
+            flags.add(token)
+    return flags
+
+
+def _curl_config_lines(options):
+    """
+    Translate curl options (argv without "curl") into -K config file lines.
+
+    Only flags whose arity is known are translated; anything else returns
+    None so the caller keeps the options on the command line.
+    """
+    lines = []
+    tokens = iter(options)
+    for token in tokens:
+        if not token.startswith("-"):
+            lines.append(f'url = "{token.translate(_CURL_CONFIG_ESCAPES)}"')
+        elif token in _CURL_BOOL_FLAGS or token == "--next":
+            lines.append(token)
+        elif (
+            len(token) > 1
+            and token[1] != "-"
+            and set(token[1:]) <= _CURL_BOOL_SHORT
+        ):
+            lines.extend(f"-{flag}" for flag in token[1:])
+        elif token.startswith("-X") and len(token) > 2:
+            lines.append(f'-X "{token[2:].translate(_CURL_CONFIG_ESCAPES)}"')
+        elif token in _CURL_VALUE_FLAGS or token in _CURL_BATCH_VALUE_FLAGS:
+            value = next(tokens, None)
+            if value is None:
+                return None
+            lines.append(f'{token} "{value.translate(_CURL_CONFIG_ESCAPES)}"')
+        else:
+            return None
+    return lines
+
+
+def _report_background_error(future):
+    """Done-callback that surfaces exceptions from background summary writes."""
+    if not future.cancelled() and future.exception() is not None:
+        log.warning(f"Background execution summary failed: {future.exception()}")
+
+
+# Known API resources, checked in order by _extract_resource_from_intent
+_COMMON_RESOURCES = (
+    "users",
+    "user",
+    "books",
+    "book",
+    "products",
+    "product",
+    "orders",
+    "order",
+    "items",
+    "item",
+    "posts",
+    "post",
+    "comments",
+    "comment",
+    "categories",
+    "category",
+    "login",
+    "auth",
+    "authentication",
+    "register",
+    "signup",
+    "accounts",
+    "account",
+    "customers",
+    "customer",
+    "employees",
+    "employee",
+)
+
+# Resources that are not pluralized when normalizing
+_NON_PLURALIZE = frozenset(["login", "auth", "authentication", "register", "signup"])
+
+# Fallback patterns when no known resource appears in the intent
+_RESOURCE_FALLBACK_PATTERNS = (
+    re.compile(
+        r"(?:get|fetch|retrieve|list|create|add|update|delete|remove)\s+(?:a\s+)?(?:new\s+)?(\w+)"
+    ),
+    re.compile(r"(\w+)\s+(?:with|by|for)\s+"),
+)
 
 class APIWrapper:
 
@@ -25,14 +287,114 @@ class APIWrapper:
             rag_instance: RAG instance with embedded swagger (can be set via fixture)
         """
         self.base_url = base_url
-        self.rag_instance = rag_instance
+        # Falls back to the instance the api_context fixture publishes
+        self.rag_instance = (
+            rag_instance
+            if rag_instance is not None
+            else getattr(builtins, "RAG_INSTANCE", None)
+        )
         self.session = requests.Session()
+        self.session.verify = False
+
+        # Larger connection pool + transport-level retry for transient 5xx
+        # (idempotent methods only, so a POST/PATCH is never sent twice)
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                # Hand back the last 5xx (as curl would) instead of a RetryError
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Generated curl commands get their own session: no transport retry
+        # (a 5xx is what the test observes) and no cookie jar, so one
+        # intent's Set-Cookie never authenticates a later request
+        self._curl_session = requests.Session()
+        self._curl_session.verify = False
+        self._curl_session.cookies.set_policy(
+            http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        )
+        curl_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0)
+        self._curl_session.mount("http://", curl_adapter)
+        self._curl_session.mount("https://", curl_adapter)
         self.timeout = 30  # Default timeout
+        self._is_windows = sys.platform.startswith("win")
         self.config = getattr(builtins, "CONFIG", {})
         self.agent_mode = self.config.get("agent_mode", "ENABLED")
+        # Max response body size in bytes (0 = unlimited)
+        self.max_body_bytes = self.config.get("max_body_bytes", 0)
+
+        # In-flight execute_by_intent runs keyed by (base_url, intent)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        # LRU of built Duo action prompts keyed by input digests
+        self._prompt_cache = OrderedDict()
+
+        # Guards the LRU caches below when intents run concurrently
+        self._cache_lock = threading.Lock()
+
+        # Per-thread AIAgent for execute_intents workers (see ai_agent)
+        self._thread_state = threading.local()
+
+        # LRU of swagger matches keyed by normalized intent digest
+        self._rag_cache = OrderedDict()
+
+        # LRU of successful step-7 analyses keyed by a digest of their inputs
+        self._analysis_cache = OrderedDict()
+        self.analysis_cache_ttl = self.config.get("analysis_cache_ttl", 3600)
+
+        # LRU of swagger matches keyed by intent-embedding bucket
+        self._swagger_cache = OrderedDict()
+        self._swagger_projection = None
 
-        # Dependency Injection: Wrapper creates the Agent and passes itself
-        self.ai_agent = AIAgent(api_wrapper=self)
+        # Created on first use when CONFIG["background_summary"] is enabled
+        self._log_pool = None
+
+        # Created on first use when CONFIG["overlap_learning_store"] is enabled
+        self._store_pool = None
+
+        # Created on first use when CONFIG["speculative_retry"] is enabled
+        self._speculative_executor = None
+        self._speculative_agent = None
+
+        # Dependency Injection: Wrapper creates the Agent and passes itself.
+        # Created on first use, so wrappers that never call Duo stay cheap.
+        self._ai_agent = None
+        self._agent_lock = threading.Lock()
+
+    @property
+    def ai_agent(self):
+        """
+        AIAgent used by the calling thread.
+
+        execute_intents workers each get their own agent, since an agent keeps
+        conversation state; all other callers share the wrapper's agent.
+        """
+        agent = getattr(self._thread_state, "ai_agent", None) or self._ai_agent
+        if agent is None:
+            with self._agent_lock:
+                if self._ai_agent is None:
+                    self._ai_agent = self._new_ai_agent()
+            agent = self._ai_agent
+        return agent
+
+    @ai_agent.setter
+    def ai_agent(self, agent):
+        self._ai_agent = agent
+
+    def _new_ai_agent(self):
+        """Create an AIAgent bound to this wrapper (module imported on first use)."""
+        from Utils.ai_agent import AIAgent
+
+        return AIAgent(api_wrapper=self)
 
     def initialize_api_session(self, base_url):
         self.base_url = base_url
@@ -51,23 +413,40 @@ class APIWrapper:
         return url, request_body
 
     def process_api_response(self, response, exp_status_code=None, exp_body=None):
-        log.safe_print(f"Response Status: {response.status_code}")
-        log.safe_print(f"Response Body: {response.text}")
+        log.safe_print("Response Status: %s", response.status_code)
+        if log.is_enabled_for(logging.DEBUG):
+            log.safe_print("Response Body: %s", response.text)
+        else:
+            # Decode only the preview slice instead of the whole body
+            log.safe_print(
+                "Response Body: %s",
+                response.content[:_LOG_PREVIEW_CHARS].decode(
+                    response.encoding or "utf-8", errors="replace"
+                ),
+            )
 
-        if exp_status_code:
-            assert (
-                response.status_code == exp_status_code
-            ), f"Expected status {exp_status_code}, got {response.status_code}"
+        # Explicit checks (not assert) so validation still runs under python -O
+        if exp_status_code and response.status_code != exp_status_code:
+            raise AssertionError(
+                f"Expected status {exp_status_code}, got {response.status_code}"
+            )
 
         if exp_body:
             try:
-                resp_json = response.json()
+                resp_json = json_loads(response.content)
+                missing = object()
+                resp_get = (
+                    resp_json.get if isinstance(resp_json, dict) else lambda k, d: d
+                )
                 for key, value in exp_body.items():
                     try:
-                        assert key in resp_json, f"Key {key} not found in response"
-                        assert (
-                            resp_json[key] == value
-                        ), f"Value mismatch for {key}: expected {value}, got {resp_json[key]}"
+                        actual = resp_get(key, missing)
+                        if actual is missing:
+                            raise AssertionError(f"Key {key} not found in response")
+                        if actual != value:
+                            raise AssertionError(
+                                f"Value mismatch for {key}: expected {value}, got {actual}"
+                            )
                     except AssertionError as e:
                         if self.agent_mode == "ENABLED":
                             log.safe_print(
@@ -118,13 +497,14 @@ class APIWrapper:
             base_url, endpoint, headers, test_data=request_body
         )
 
-        log.safe_print(f"Making POST request to: {url}")
-        log.safe_print(f"Headers: {headers}")
-        log.safe_print(f"Request Body: {body}")
+        log.safe_print("Making POST request to: %s", url)
+        if log.is_enabled_for(logging.DEBUG):
+            log.safe_print("Headers: %s", headers)
+            log.safe_print("Request Body: %s", body)
 
         try:
             response = self.session.post(
-                url, headers=headers, json=body, timeout=self.timeout, verify=False
+                url, headers=headers, json=body, timeout=self.timeout
             )
         except requests.RequestException as e:
             log.safe_print(f"Request failed: {e}")
@@ -162,26 +542,144 @@ class APIWrapper:
             assert_success (bool): If True, raises AssertionError when AI analysis returns failure.
                                    Set to False for negative testing scenarios.
 
+        Concurrent calls with the same intent and base URL are deduplicated:
+        the first caller runs the pipeline and the others wait for its result
+        and receive their own copy.
+
         Returns:
             dict: Structured result with success status, curl command, response, and analysis
         """
         # Use instance defaults if not provided
         if base_url is None:
             base_url = self.base_url
+
+        # Single-flight: join an identical in-flight execution if there is one
+        key = (base_url, intent)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if is_leader:
+            try:
+                result = self._execute_intent_pipeline(
+                    intent, base_url, rag_instance, max_retries
+                )
+                # Share a snapshot so the caller's mutations don't leak to followers
+                future.set_result(copy.deepcopy(result))
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+        else:
+            result = copy.deepcopy(future.result())
+
+        # ============================================================================
+        # STEP 9: ASSERT SUCCESS (if enabled)
+        # ============================================================================
+        # Only runs that reached AI analysis are asserted; early exits (no RAG,
+        # no Duo response, ...) return the result with "error" set.
+        if assert_success and "analysis_result" in result and not result["success"]:
+            raise AssertionError(
+                f"AI Analysis Failed: {result.get('reason', 'No reason provided')}"
+            )
+
+        return result
+
+    def execute_intents(
+        self,
+        intents: list,
+        base_url: str = None,
+        rag_instance=None,
+        max_retries: int = 2,
+        assert_success: bool = True,
+        max_parallel: int = None,
+    ) -> list:
+        """
+        Execute several independent intents concurrently.
+
+        Each intent runs the full execute_by_intent pipeline on a worker
+        thread, so RAG lookups, Duo calls and HTTP requests of different
+        intents overlap instead of running back to back.
+
+        Args:
+            intents (list): Natural language intents
+            base_url (str): Base URL for the API. Uses instance base_url if not provided.
+            rag_instance: RAG instance with embedded swagger. Uses instance rag_instance if not provided.
+            max_retries (int): Maximum number of retry attempts per intent
+            assert_success (bool): If True, raises AssertionError after all intents
+                                   finished if any AI analysis returned failure.
+            max_parallel (int): Max intents in flight (default: CONFIG["max_parallel"] or 8)
+
+        Returns:
+            list: One execute_by_intent result dict per intent, in input order
+        """
+        if not intents:
+            return []
+        if max_parallel is None:
+            max_parallel = self.config.get("max_parallel", 8)
+
+        def _init_worker():
+            self._thread_state.ai_agent = self._new_ai_agent()
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_parallel, len(intents))),
+            initializer=_init_worker,
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self.execute_by_intent,
+                    intent,
+                    base_url,
+                    rag_instance,
+                    max_retries,
+                    False,
+                )
+                for intent in intents
+            ]
+            results = [future.result() for future in futures]
+
+        if assert_success:
+            failed = [
+                f"{intent}: {result.get('reason', 'No reason provided')}"
+                for intent, result in zip(intents, results)
+                if "analysis_result" in result and not result["success"]
+            ]
+            if failed:
+                raise AssertionError("AI Analysis Failed:\n" + "\n".join(failed))
+
+        return results
+
+    def _execute_intent_pipeline(
+        self, intent: str, base_url: str, rag_instance, max_retries: int
+    ) -> dict:
+        """
+        Run the full intent pipeline (steps 1-8 of execute_by_intent).
+
+        Returns:
+            dict: Structured result; assertion on failure is left to the caller
+        """
         if rag_instance is None:
+            if self.rag_instance is None:
+                # Wrapper was created before RAG_INSTANCE was published
+                self.rag_instance = getattr(builtins, "RAG_INSTANCE", None)
             rag_instance = self.rag_instance
 
         # Initialize logger with API test type
         logger = IntentLogger(test_type="API")
         logger.start_session(intent=intent)
 
-        logger.log(f"\n{'='*100}")
+        logger.log(f"\n{_RULE100}")
         logger.log(
             f"[INTENT EXECUTION WITH LEARNING] Starting intent-based API execution"
         )
         logger.log(f"[INTENT] {intent}")
         logger.log(f"[BASE URL] {base_url}")
-        logger.log(f"{'='*100}")
+        logger.log(_RULE100)
 
         result = {
             "success": False,
@@ -203,21 +701,19 @@ class APIWrapper:
 
         # Step 1: Get RAG instance
         if rag_instance is None:
-            rag_instance = getattr(builtins, "RAG_INSTANCE", None)
-            if rag_instance is None:
-                result["error"] = (
-                    "RAG instance not available. Please ensure swagger is embedded first."
-                )
-                logger.log(f"[ERROR] {result['error']}")
-                logger.end_session()
-                return result
+            result["error"] = (
+                "RAG instance not available. Please ensure swagger is embedded first."
+            )
+            logger.log(f"[ERROR] {result['error']}")
+            logger.end_session()
+            return result
 
         # ============================================================================
         # STEP 1: EXTRACT ENDPOINT FROM SWAGGER BY INTENT (TF-IDF)
         # ============================================================================
         logger.log_section("[STEP 1] EXTRACT ENDPOINT FROM SWAGGER BY INTENT")
 
-        swagger_match = rag_instance.extract_resource_from_swagger_by_intent(intent)
+        swagger_match = self._extract_swagger_match(rag_instance, intent)
 
         resource = swagger_match.get("resource", "unknown")
         method = swagger_match.get("method", "GET")
@@ -252,7 +748,9 @@ class APIWrapper:
                 f"\n[OK] Found [correct] stored action for endpoint: {method} {endpoint_pattern}"
             )
             logger.log_titled_block(
-                "STORED METADATA", json.dumps(stored_metadata, indent=2), max_chars=3000
+                "STORED METADATA",
+                functools.partial(json_dumps_pretty, stored_metadata),
+                max_chars=3000,
             )
         else:
             if stored_action["found"]:
@@ -297,36 +795,46 @@ class APIWrapper:
         logger.log_section("[STEP 4] GITLAB DUO - GENERATING API ACTION METADATA")
         logger.log(f"[Source] Stored metadata: {'Yes' if stored_metadata else 'No'}")
         logger.log(f"[Source] Swagger context: {'Yes' if swagger_context else 'No'}")
-        logger.log(f"[Sending request to GitLab Duo...]")
 
-        # Build the prompt - ALWAYS include BOTH stored_metadata AND swagger_context
-        duo_prompt = get_api_endpoint_action_prompt(
-            resource=resource,
-            intent=intent,
-            swagger_context=swagger_context or "",
-            stored_metadata=stored_metadata,
-            base_url=base_url,
-        )
+        action_metadata = None
+        if self.config.get("reuse_stored_curl", False):
+            action_metadata = self._reusable_stored_action(
+                intent, base_url, stored_metadata
+            )
 
-        result["prompts"]["action_generation"] = duo_prompt
-        logger.log_prompt(duo_prompt)
+        if action_metadata:
+            logger.log("[CACHE HIT] Same intent already verified, reusing stored curl")
+        else:
+            logger.log(f"[Sending request to GitLab Duo...]")
+
+            # Build the prompt - ALWAYS include BOTH stored_metadata AND swagger_context
+            duo_prompt = self._build_action_prompt(
+                resource=resource,
+                intent=intent,
+                swagger_context=swagger_context or "",
+                stored_metadata=stored_metadata,
+                base_url=base_url,
+            )
 
-        # Call GitLab Duo
-        duo_response = self.ai_agent.run_agent_based_on_context(
-            context="API_ENDPOINT_ACTION", prompt=duo_prompt, return_prompt=False
-        )
+            result["prompts"]["action_generation"] = _capture(duo_prompt)
+            logger.log_prompt(duo_prompt)
 
-        result["responses"]["action_generation"] = duo_response
-        logger.log_ai_response(duo_response)
+            # Call GitLab Duo
+            duo_response = self.ai_agent.run_agent_based_on_context(
+                context="API_ENDPOINT_ACTION", prompt=duo_prompt, return_prompt=False
+            )
 
-        if not duo_response:
-            result["error"] = "Failed to get action metadata from GitLab Duo"
-            logger.log(f"[ERROR] {result['error']}")
-            logger.end_session()
-            return result
+            result["responses"]["action_generation"] = _capture(duo_response)
+            logger.log_ai_response(duo_response)
 
-        # Parse the action metadata from DUO response
-        action_metadata = self._parse_action_metadata(duo_response)
+            if not duo_response:
+                result["error"] = "Failed to get action metadata from GitLab Duo"
+                logger.log(f"[ERROR] {result['error']}")
+                logger.end_session()
+                return result
+
+            # Parse the action metadata from DUO response
+            action_metadata = self._parse_action_metadata(duo_response)
 
         if not action_metadata:
             result["error"] = "Failed to parse action metadata from GitLab Duo response"
@@ -337,7 +845,9 @@ class APIWrapper:
         result["action_metadata"] = action_metadata
         logger.log(f"\n[OK] Parsed action metadata:")
         logger.log_titled_block(
-            "ACTION METADATA", json.dumps(action_metadata, indent=2), max_chars=3000
+            "ACTION METADATA",
+            functools.partial(json_dumps_pretty, action_metadata),
+            max_chars=3000,
         )
 
         # Extract curl command from action metadata
@@ -359,37 +869,37 @@ class APIWrapper:
         # ============================================================================
         logger.log_section("[STEP 5] EXECUTING CURL COMMAND")
 
+        speculative_retry = self.config.get("speculative_retry", False)
+
         attempt = 0
         execution_result = None
         while attempt <= max_retries:
             logger.log(f"\n[Attempt {attempt + 1}/{max_retries + 1}]")
             logger.log(f"[Executing command]: {curl_command[:100]}...")
 
+            # Ask Duo for a fix in parallel with the curl, so a failing attempt
+            # doesn't wait a full Duo round-trip before retrying
+            spec_future = None
+            if speculative_retry and attempt < max_retries:
+                spec_future = self._submit_speculative_fix(
+                    intent, curl_command, swagger_context or "", base_url
+                )
+
             execution_result = self._execute_curl(curl_command)
             result["status_code"] = execution_result["status_code"]
             result["response_body"] = execution_result["stdout"]
+            result.pop("_pretty_body", None)
             result["retries"] = attempt
 
             if execution_result["success"]:
+                if spec_future:
+                    spec_future.cancel()
                 logger.log(f"\n[OK] Curl executed successfully!")
                 logger.log(f"\n{'-'*40} CURL RESPONSE {'-'*40}")
                 logger.log(f"HTTP Status Code: {execution_result['status_code']}")
                 logger.log(f"\nResponse Body:")
-                try:
-                    resp_json = json.loads(execution_result["stdout"])
-                    formatted_resp = json.dumps(resp_json, indent=2)
-                    if len(formatted_resp) > 3000:
-                        logger.log(formatted_resp[:3000])
-                        logger.log(f"\n... (truncated)")
-                    else:
-                        logger.log(formatted_resp)
-                except:
-                    if len(execution_result["stdout"]) > 3000:
-                        logger.log(execution_result["stdout"][:3000])
-                        logger.log(f"\n... (truncated)")
-                    else:
-                        logger.log(execution_result["stdout"])
-                logger.log(f"{'-'*90}")
+                logger.log_lazy(lambda: self._format_response_preview(result))
+                logger.log(_RULE90)
                 break
             else:
                 error_msg = execution_result["stderr"] or execution_result["error"]
@@ -397,39 +907,50 @@ class APIWrapper:
                 logger.log(f"Error: {error_msg}")
 
                 if attempt < max_retries:
-                    # STEP 1: Get AI analysis of why the request failed
-                    logger.log(f"\n[RETRY] Getting AI analysis of failure...")
-                    ai_analysis = self.ai_agent.analyze_api_response(
-                        intent=intent,
-                        curl_command=curl_command,
-                        response=error_msg,
-                        expected_status=200,
-                    )
-                    logger.log(f"[RETRY] AI Analysis: {str(ai_analysis)[:200]}...")
+                    fixed_curl = None
+                    if spec_future:
+                        fixed_curl = self._collect_speculative_fix(
+                            spec_future, curl_command, logger
+                        )
 
-                    # STEP 2: Use ENHANCED retry with AI analysis and all original context
-                    logger.log(
-                        f"\n[RETRY] Asking GitLab Duo with AI analysis to fix curl..."
-                    )
+                    if fixed_curl:
+                        retry_prompt = "(Speculative retry)"
+                    else:
+                        # STEP 1: Get AI analysis of why the request failed
+                        logger.log(f"\n[RETRY] Getting AI analysis of failure...")
+                        ai_analysis = self.ai_agent.analyze_api_response(
+                            intent=intent,
+                            curl_command=curl_command,
+                            response=error_msg,
+                            expected_status=200,
+                        )
+                        logger.log(
+                            f"[RETRY] AI Analysis: {str(ai_analysis)[:200]}..."
+                        )
 
-                    retry_response = self.ai_agent.run_agent_based_on_context(
-                        context="API_ENDPOINT_RETRY",
-                        resource=resource,
-                        intent=intent,
-                        failed_curl=curl_command,
-                        error_output=error_msg,
-                        ai_analysis=str(ai_analysis) if ai_analysis else "",
-                        stored_metadata=stored_metadata,  # Original stored metadata
-                        swagger_context=swagger_context or "",
-                        base_url=base_url,
-                        return_prompt=False,
-                    )
+                        # STEP 2: Use ENHANCED retry with AI analysis and all original context
+                        logger.log(
+                            f"\n[RETRY] Asking GitLab Duo with AI analysis to fix curl..."
+                        )
+
+                        retry_response = self.ai_agent.run_agent_based_on_context(
+                            context="API_ENDPOINT_RETRY",
+                            resource=resource,
+                            intent=intent,
+                            failed_curl=curl_command,
+                            error_output=error_msg,
+                            ai_analysis=str(ai_analysis) if ai_analysis else "",
+                            stored_metadata=stored_metadata,  # Original stored metadata
+                            swagger_context=swagger_context or "",
+                            base_url=base_url,
+                            return_prompt=False,
+                        )
 
-                    fixed_curl = retry_response
-                    retry_prompt = "(Enhanced retry with AI analysis)"
+                        fixed_curl = retry_response
+                        retry_prompt = "(Enhanced retry with AI analysis)"
 
                     result["prompts"][f"retry_{attempt+1}"] = retry_prompt
-                    result["responses"][f"retry_{attempt+1}"] = fixed_curl
+                    result["responses"][f"retry_{attempt+1}"] = _capture(fixed_curl)
 
                     if fixed_curl:
                         logger.log_ai_response(fixed_curl)
@@ -464,7 +985,8 @@ class APIWrapper:
         logger.log(f"[Learning Status] {learning_status}")
 
         # Store the action in ChromaDB using endpoint pattern as doc_id
-        rag_instance.store_api_action_from_duo(
+        store_action = functools.partial(
+            rag_instance.store_api_action_from_duo,
             resource=resource,
             duo_response=action_metadata,
             execution_result={
@@ -477,9 +999,20 @@ class APIWrapper:
             endpoint_pattern=endpoint_pattern,
         )
 
-        logger.log(
-            f"[OK] Stored action with status {learning_status} for endpoint: {method} {endpoint_pattern}"
-        )
+        store_future = None
+        if self.config.get("overlap_learning_store", False):
+            # The store (document embedding + write) doesn't depend on the
+            # analysis, so let it run while Duo analyzes the response
+            with self._cache_lock:
+                if self._store_pool is None:
+                    self._store_pool = ThreadPoolExecutor(max_workers=2)
+            store_future = self._store_pool.submit(store_action)
+            logger.log("[Started] Storing action in background during analysis")
+        else:
+            store_action()
+            logger.log(
+                f"[OK] Stored action with status {learning_status} for endpoint: {method} {endpoint_pattern}"
+            )
 
         logger.log_step_separator()
 
@@ -487,25 +1020,16 @@ class APIWrapper:
         # STEP 7: GITLAB DUO - ANALYZE RESPONSE
         # ============================================================================
         logger.log_section("[STEP 7] GITLAB DUO - ANALYZING RESPONSE")
-        logger.log(f"[Sending response to GitLab Duo for analysis...]")
 
-        analysis_result = self.ai_agent.analyze_api_response(
-            intent=intent,
-            curl_command=result["curl_command"],
-            response_body=result["response_body"] or "",
-            status_code=result["status_code"] or -1,
-            stderr=execution_result.get("stderr", "") if execution_result else "",
-            return_prompt=True,
+        analysis, analysis_prompt = self._analyze_response(
+            intent,
+            result,
+            execution_result.get("stderr", "") if execution_result else "",
+            logger,
         )
 
-        if isinstance(analysis_result, tuple):
-            analysis, analysis_prompt = analysis_result
-        else:
-            analysis = analysis_result
-            analysis_prompt = "(Prompt not available)"
-
-        result["prompts"]["analysis"] = analysis_prompt
-        result["responses"]["analysis"] = analysis
+        result["prompts"]["analysis"] = _capture(analysis_prompt)
+        result["responses"]["analysis"] = _capture(analysis)
 
         logger.log_prompt(analysis_prompt)
 
@@ -514,12 +1038,19 @@ class APIWrapper:
         if analysis:
             # Handle both dict and string analysis for logging
             if isinstance(analysis, dict):
-                logger.log_ai_response(json.dumps(analysis, indent=2))
+                if logger.is_enabled():
+                    logger.log_ai_response(json_dumps_pretty(analysis))
             else:
                 logger.log_ai_response(analysis)
         else:
             logger.log("(No analysis returned)")
 
+        if store_future is not None:
+            store_future.result()
+            logger.log(
+                f"\n[OK] Stored action with status {learning_status} for endpoint: {method} {endpoint_pattern}"
+            )
+
         logger.log_step_separator()
 
         # ============================================================================
@@ -576,21 +1107,317 @@ class APIWrapper:
         }
         logger.log_summary(summary_data)
 
-        # Print final summary box
-        self._print_execution_summary(result, logger)
+        # Print final summary box and end logging session
+        if self.config.get("background_summary", False):
+            # Format/write off the request path; one worker keeps tests in order
+            if self._log_pool is None:
+                self._log_pool = ThreadPoolExecutor(max_workers=1)
+            future = self._log_pool.submit(
+                self._finish_intent_log, dict(result), logger
+            )
+            future.add_done_callback(_report_background_error)
+        else:
+            self._finish_intent_log(result, logger)
 
-        # End logging session
-        logger.end_session()
+        # The pretty-printed body cache only serves the logs above
+        result.pop("_pretty_body", None)
+        return result
 
-        # ============================================================================
-        # STEP 9: ASSERT SUCCESS (if enabled)
-        # ============================================================================
-        if assert_success and not result["success"]:
-            raise AssertionError(
-                f"AI Analysis Failed: {result.get('reason', 'No reason provided')}"
+    def _finish_intent_log(self, result: dict, logger: IntentLogger):
+        """Print the final summary box and end the intent logging session."""
+        try:
+            self._print_execution_summary(result, logger)
+        finally:
+            logger.end_session()
+
+    def close(self):
+        """Flush pending background logging and release executors and the session."""
+        if self._log_pool is not None:
+            self._log_pool.shutdown(wait=True)
+            self._log_pool = None
+        if self._store_pool is not None:
+            self._store_pool.shutdown(wait=True)
+            self._store_pool = None
+        if self._speculative_executor is not None:
+            self._speculative_executor.shutdown(wait=False, cancel_futures=True)
+            self._speculative_executor = None
+        self.session.close()
+        self._curl_session.close()
+
+    def _submit_speculative_fix(
+        self, intent: str, curl_command: str, swagger_context: str, base_url: str
+    ) -> Future:
+        """
+        Start a curl fix request to GitLab Duo before the curl result is known.
+
+        Runs on a dedicated AIAgent so it never shares conversation state with
+        the main agent if it is still running after the curl succeeds.
+        """
+        if self._speculative_executor is None:
+            self._speculative_executor = ThreadPoolExecutor(max_workers=2)
+            self._speculative_agent = self._new_ai_agent()
+
+        return self._speculative_executor.submit(
+            self._speculative_agent.retry_curl_generation,
+            intent=intent,
+            original_curl=curl_command,
+            error_output="(speculative fix - execution result not yet known)",
+            swagger_context=swagger_context,
+            base_url=base_url,
+        )
+
+    def _collect_speculative_fix(
+        self, spec_future: Future, curl_command: str, logger: IntentLogger
+    ) -> str:
+        """
+        Wait for a speculative fix and return it, or None if it is unusable.
+
+        An unusable fix (error, timeout, empty, or same as the failed command)
+        makes the caller fall back to the analysis-driven retry.
+        """
+        try:
+            fixed_curl = spec_future.result(timeout=self.timeout)
+        except Exception as e:
+            logger.log(f"[RETRY] Speculative fix unavailable: {e}")
+            return None
+
+        if not fixed_curl or self._clean_curl_command(fixed_curl) == curl_command:
+            logger.log("[RETRY] Speculative fix did not change the command")
+            return None
+
+        logger.log("\n[RETRY] Using speculative fix prepared during execution")
+        return fixed_curl
+
+    def _format_response_preview(self, result: dict, max_chars: int = 3000) -> str:
+        """Pretty-print the response body (JSON if possible) for the intent log."""
+        text = self._pretty_response_body(result)
+        if text is None:
+            text = result["response_body"]
+        if len(text) > max_chars:
+            return f"{text[:max_chars]}\n\n... (truncated)"
+        return text
+
+    def _pretty_response_body(self, result: dict):
+        """
+        Pretty-printed JSON of result["response_body"], or None if it isn't JSON.
+
+        Cached on result["_pretty_body"] (popped before the result is
+        returned), so the response preview and the execution summary parse
+        and serialize the body only once. Bodies over _PRETTY_MAX_CHARS are
+        left raw, since the logs truncate them anyway.
+        """
+        if "_pretty_body" not in result:
+            if len(result["response_body"] or "") > _PRETTY_MAX_CHARS:
+                result["_pretty_body"] = None
+                return None
+            try:
+                result["_pretty_body"] = json_dumps_pretty(
+                    json_loads(result["response_body"])
+                )
+            except (ValueError, TypeError):
+                result["_pretty_body"] = None
+        return result["_pretty_body"]
+
+    def _extract_swagger_match(self, rag_instance, intent: str) -> dict:
+        """
+        Step 1 swagger lookup, memoized per normalized intent.
+
+        The swagger collection doesn't change once embedded, so a repeated
+        intent (case/whitespace-insensitive) reuses the earlier match instead
+        of another embedding + vector search.
+        """
+        key = (
+            id(rag_instance),
+            hashlib.blake2b(
+                intent.strip().lower().encode("utf-8"), digest_size=16
+            ).digest(),
+        )
+        with self._cache_lock:
+            cached = self._rag_cache.get(key)
+            if cached is not None:
+                self._rag_cache.move_to_end(key)
+        if cached is not None:
+            log.safe_print(f"[CACHE HIT] Swagger match for intent: {intent}")
+            return dict(cached)
+
+        swagger_match = self._lookup_swagger_match(rag_instance, intent)
+        if swagger_match.get("swagger_context"):
+            with self._cache_lock:
+                self._rag_cache[key] = dict(swagger_match)
+                if len(self._rag_cache) > _RAG_CACHE_SIZE:
+                    self._rag_cache.popitem(last=False)
+        return swagger_match
+
+    def _lookup_swagger_match(self, rag_instance, intent: str) -> dict:
+        """
+        Query the swagger collection, optionally via a fuzzy intent cache.
+
+        With CONFIG["swagger_fuzzy_cache"] enabled, the intent embedding is
+        hashed into a random-projection bucket. A cached match in the same
+        bucket with cosine similarity >= _SWAGGER_CACHE_MIN_SIMILARITY is
+        reused, so wording variants ("list users", "get all users") skip the
+        Chroma query. On a miss, the computed embedding is passed to the query
+        so the intent is embedded only once.
+        """
+        if not self.config.get("swagger_fuzzy_cache", False):
+            return rag_instance.extract_resource_from_swagger_by_intent(intent)
+
+        try:
+            embedding = rag_instance.embedding_fn([intent])[0]
+        except Exception as e:
+            log.warning(f"Could not embed intent for swagger cache: {e}")
+            return rag_instance.extract_resource_from_swagger_by_intent(intent)
+
+        import numpy as np
+
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec = vec / norm
+
+        with self._cache_lock:
+            if (
+                self._swagger_projection is None
+                or self._swagger_projection.shape[0] != vec.shape[0]
+            ):
+                rng = np.random.default_rng(0)
+                self._swagger_projection = rng.standard_normal(
+                    (vec.shape[0], _SWAGGER_CACHE_BITS)
+                ).astype(np.float32)
+                self._swagger_cache.clear()
+
+            bucket = tuple((vec @ self._swagger_projection > 0).tolist())
+            key = (id(rag_instance), bucket)
+            cached = self._swagger_cache.get(key)
+            if cached is not None:
+                cached_vec, cached_match = cached
+                if float(vec @ cached_vec) < _SWAGGER_CACHE_MIN_SIMILARITY:
+                    cached = None
+                else:
+                    self._swagger_cache.move_to_end(key)
+
+        if cached is not None:
+            log.safe_print(
+                f"[SWAGGER] Cache hit: {cached_match.get('method')} "
+                f"{cached_match.get('endpoint_pattern')}"
             )
+            return dict(cached_match)
 
-        return result
+        swagger_match = rag_instance.extract_resource_from_swagger_by_intent(
+            intent, query_embedding=list(embedding)
+        )
+        if swagger_match.get("swagger_context"):
+            with self._cache_lock:
+                self._swagger_cache[key] = (vec, dict(swagger_match))
+                if len(self._swagger_cache) > _SWAGGER_CACHE_SIZE:
+                    self._swagger_cache.popitem(last=False)
+        return swagger_match
+
+    def _build_action_prompt(
+        self,
+        resource: str,
+        intent: str,
+        swagger_context: str,
+        stored_metadata: dict,
+        base_url: str,
+    ) -> str:
+        """
+        Build the API_ENDPOINT_ACTION prompt, reusing it for repeated inputs.
+
+        The cache key uses BLAKE2b digests of the swagger context and stored
+        metadata so large contexts are not kept as dict keys.
+        """
+        ctx_key = hashlib.blake2b(
+            swagger_context.encode("utf-8"), digest_size=16
+        ).hexdigest()
+        meta_key = hashlib.blake2b(
+            json.dumps(stored_metadata or {}, sort_keys=True, default=str).encode(
+                "utf-8"
+            ),
+            digest_size=16,
+        ).hexdigest()
+        key = (resource, intent, ctx_key, meta_key, base_url)
+
+        with self._cache_lock:
+            prompt = self._prompt_cache.get(key)
+            if prompt is not None:
+                self._prompt_cache.move_to_end(key)
+                return prompt
+
+        prompt = get_api_endpoint_action_prompt(
+            resource=resource,
+            intent=intent,
+            swagger_context=swagger_context,
+            stored_metadata=stored_metadata,
+            base_url=base_url,
+        )
+        with self._cache_lock:
+            self._prompt_cache[key] = prompt
+            if len(self._prompt_cache) > _PROMPT_CACHE_SIZE:
+                self._prompt_cache.popitem(last=False)
+        return prompt
+
+    def _analyze_response(
+        self, intent: str, result: dict, stderr: str, logger: IntentLogger
+    ) -> tuple:
+        """
+        Step 7 Duo analysis, reusing a recent success for identical inputs.
+
+        Reruns of idempotent calls often produce the exact same response. The
+        key is a BLAKE2b digest of everything the analysis prompt is built
+        from, and only analyses that reported success are kept, for
+        analysis_cache_ttl seconds (CONFIG["analysis_cache_ttl"], 0 disables).
+
+        Returns:
+            tuple: (analysis, analysis_prompt)
+        """
+        response_body = result["response_body"] or ""
+        status_code = result["status_code"] or -1
+        ttl = self.analysis_cache_ttl
+
+        key = None
+        if ttl:
+            digest = hashlib.blake2b(digest_size=16)
+            for part in (intent.strip().lower(), result["curl_command"] or "", stderr):
+                digest.update(part.encode("utf-8") + b"\0")
+            digest.update(f"{status_code}\0{response_body}".encode("utf-8"))
+            key = digest.digest()
+
+            with self._cache_lock:
+                cached = self._analysis_cache.get(key)
+                if cached is not None:
+                    if time.monotonic() - cached[0] < ttl:
+                        self._analysis_cache.move_to_end(key)
+                    else:
+                        del self._analysis_cache[key]
+                        cached = None
+            if cached is not None:
+                logger.log("[CACHE HIT] Analysis reused for identical response")
+                return copy.deepcopy(cached[1]), cached[2]
+
+        logger.log(f"[Sending response to GitLab Duo for analysis...]")
+        # return_prompt=True always yields (analysis, prompt)
+        analysis, analysis_prompt = self.ai_agent.analyze_api_response(
+            intent=intent,
+            curl_command=result["curl_command"],
+            response_body=response_body,
+            status_code=status_code,
+            stderr=stderr,
+            return_prompt=True,
+        )
+
+        if key is not None:
+            analysis_json = self._parse_analysis_json(analysis)
+            if analysis_json and analysis_json.get("success") is True:
+                with self._cache_lock:
+                    self._analysis_cache[key] = (
+                        time.monotonic(),
+                        copy.deepcopy(analysis),
+                        analysis_prompt,
+                    )
+                    if len(self._analysis_cache) > _ANALYSIS_CACHE_SIZE:
+                        self._analysis_cache.popitem(last=False)
+        return analysis, analysis_prompt
 
     def _extract_resource_from_intent(self, intent: str) -> str:
         """
@@ -602,63 +1429,19 @@ class APIWrapper:
             "delete user with id 5" -> "users"
             "fetch products" -> "products"
         """
-        # Common resource patterns
-        common_resources = [
-            "users",
-            "user",
-            "books",
-            "book",
-            "products",
-            "product",
-            "orders",
-            "order",
-            "items",
-            "item",
-            "posts",
-            "post",
-            "comments",
-            "comment",
-            "categories",
-            "category",
-            "login",
-            "auth",
-            "authentication",
-            "register",
-            "signup",
-            "accounts",
-            "account",
-            "customers",
-            "customer",
-            "employees",
-            "employee",
-        ]
-
         intent_lower = intent.lower()
 
         # Find the first matching resource in the intent
-        for resource in common_resources:
-            if resource in intent_lower:
-                # Normalize to plural form for consistency
-                if not resource.endswith("s") and resource not in [
-                    "login",
-                    "auth",
-                    "authentication",
-                    "register",
-                    "signup",
-                ]:
-                    return resource + "s"
-                return resource
+        resource = next((r for r in _COMMON_RESOURCES if r in intent_lower), None)
+        if resource:
+            # Normalize to plural form for consistency
+            if not resource.endswith("s") and resource not in _NON_PLURALIZE:
+                return resource + "s"
+            return resource
 
         # If no known resource found, try to extract from common patterns
-        import re
-
-        patterns = [
-            r"(?:get|fetch|retrieve|list|create|add|update|delete|remove)\s+(?:a\s+)?(?:new\s+)?(\w+)",
-            r"(\w+)\s+(?:with|by|for)\s+",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, intent_lower)
+        for pattern in _RESOURCE_FALLBACK_PATTERNS:
+            match = pattern.search(intent_lower)
             if match:
                 resource = match.group(1)
                 if len(resource) > 2:  # Avoid short words like "id", "by"
@@ -667,6 +1450,73 @@ class APIWrapper:
         # Default fallback
         return "resource"
 
+    def _find_balanced_json(self, text: str, start: int = 0) -> tuple:
+        """
+        Locate the next balanced {...} block in text in a single forward scan.
+
+        Braces inside JSON string literals are ignored. If a "{" never closes,
+        scanning resumes from the next "{".
+
+        Args:
+            text: Text to scan (e.g. a raw GitLab Duo response)
+            start: Index to start scanning from
+
+        Returns:
+            tuple: (candidate_str, open_index), or (None, -1) if no block remains
+        """
+        open_idx = text.find("{", start)
+        while open_idx != -1:
+            depth = 0
+            in_string = False
+            escape = False
+            for i in range(open_idx, len(text)):
+                ch = text[i]
+                if in_string:
+                    if escape:
+                        escape = False
+                    elif ch == "\\":
+                        escape = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '"':
+                    in_string = True
+                elif ch == "{":
+                    depth += 1
+                elif ch == "}":
+                    depth -= 1
+                    if depth == 0:
+                        return text[open_idx : i + 1], open_idx
+            open_idx = text.find("{", open_idx + 1)
+        return None, -1
+
+    def _extract_json_object(self, text: str, required_keys: tuple) -> dict:
+        """
+        Extract the first JSON object in text that contains any of required_keys.
+
+        Covers markdown code blocks and prose-wrapped JSON alike. Falls back to
+        the first parseable object when none has a required key.
+
+        Returns:
+            dict: Parsed object or None if no JSON object could be parsed
+        """
+        fallback = None
+        start = 0
+        while True:
+            candidate, open_idx = self._find_balanced_json(text, start)
+            if candidate is None:
+                return fallback
+            try:
+                parsed = json_loads(candidate)
+            except json.JSONDecodeError:
+                parsed = None
+            if isinstance(parsed, dict):
+                if any(key in parsed for key in required_keys):
+                    return parsed
+                if fallback is None:
+                    fallback = parsed
+            # Step inside this block in case the wanted object is nested
+            start = open_idx + 1
+
     def _parse_action_metadata(self, duo_response: str) -> dict:
         """
         Parse action metadata JSON from GitLab Duo response.
@@ -682,41 +1532,52 @@ class APIWrapper:
 
         try:
             # Try direct JSON parse
-            return json.loads(duo_response.strip())
+            return json_loads(duo_response.strip())
         except json.JSONDecodeError:
             pass
 
-        # Try to extract JSON from markdown code blocks
-        json_patterns = [
-            r"```json\s*(.*?)\s*```",
-            r"```\s*(.*?)\s*```",
-            r'\{[^{}]*"action_key"[^{}]*\}',
-        ]
+        # Scan for a JSON object (inside code blocks or surrounding prose)
+        return self._extract_json_object(duo_response, ("action_key", "curl"))
 
-        for pattern in json_patterns:
-            matches = re.findall(pattern, duo_response, re.DOTALL | re.IGNORECASE)
-            for match in matches:
-                try:
-                    json_str = match.strip() if isinstance(match, str) else match
-                    parsed = json.loads(json_str)
-                    if "action_key" in parsed or "curl" in parsed:
-                        return parsed
-                except (json.JSONDecodeError, TypeError):
-                    continue
-
-        # Try to find JSON object with required keys
-        try:
-            start = duo_response.find("{")
-            end = duo_response.rfind("}")
-            if start != -1 and end != -1 and end > start:
-                potential_json = duo_response[start : end + 1]
-                parsed = json.loads(potential_json)
-                if isinstance(parsed, dict):
-                    return parsed
-        except json.JSONDecodeError:
-            pass
+    def _reusable_stored_action(
+        self, intent: str, base_url: str, stored_metadata: dict
+    ) -> dict:
+        """
+        Return the stored [correct] action when it was learned for this exact intent.
+
+        The learning collection keeps one action per endpoint together with the
+        intent that produced it. When the same intent runs again against the same
+        base URL, the verified curl can be executed directly and the Duo
+        generation round trip is skipped. Analysis and learning still run.
+
+        Args:
+            intent: Natural language intent being executed
+            base_url: Base URL for the API
+            stored_metadata: Stored [correct] metadata from step 2, or None
+
+        Returns:
+            dict: Action metadata ready for step 5, or None if it can't be reused
+        """
+        if not stored_metadata:
+            return None
+        curl = stored_metadata.get("curl") or ""
+        sample_intent = stored_metadata.get("sample_intent") or ""
+        # Stored fields are truncated (curl to 2000, intent to 500 chars)
+        if not curl or len(curl) >= 2000 or len(sample_intent) >= 500:
+            return None
+        if stored_metadata.get("base_url") != base_url:
+            return None
+        if sample_intent.strip().lower() != intent.strip().lower():
+            return None
 
-        return None
+        action_metadata = dict(stored_metadata, intent=sample_intent)
+        request_body = action_metadata.get("request_body")
+        if isinstance(request_body, str):
+            try:
+                action_metadata["request_body"] = json_loads(request_body)
+            except json.JSONDecodeError:
+                pass
+        return action_metadata
 
     def _parse_analysis_json(self, analysis) -> dict:
         """
@@ -737,43 +1598,12 @@ class APIWrapper:
 
         try:
             # Try to parse the analysis directly as JSON
-            return json.loads(analysis.strip())
-        except json.JSONDecodeError:
-            pass
-
-        # Try to extract JSON from markdown code blocks
-        import re
-
-        json_patterns = [
-            r"```json\s*(.*?)\s*```",  # ```json ... ```
-            r"```\s*(.*?)\s*```",  # ``` ... ```
-            r'\{[^{}]*"success"[^{}]*\}',  # Find JSON object with "success" key
-        ]
-
-        for pattern in json_patterns:
-            matches = re.findall(pattern, analysis, re.DOTALL | re.IGNORECASE)
-            for match in matches:
-                try:
-                    # If match is from regex group, use it directly
-                    json_str = match.strip() if isinstance(match, str) else match
-                    parsed = json.loads(json_str)
-                    if "success" in parsed:
-                        return parsed
-                except (json.JSONDecodeError, TypeError):
-                    continue
-
-        # Last resort: try to find and extract a JSON-like structure
-        try:
-            # Find the first { and last } to extract potential JSON
-            start = analysis.find("{")
-            end = analysis.rfind("}")
-            if start != -1 and end != -1 and end > start:
-                potential_json = analysis[start : end + 1]
-                return json.loads(potential_json)
+            return json_loads(analysis.strip())
         except json.JSONDecodeError:
             pass
 
-        return None
+        # Scan for a JSON object (inside code blocks or surrounding prose)
+        return self._extract_json_object(analysis, ("success",))
 
     def _clean_curl_command(self, curl_command: str) -> str:
         """
@@ -783,8 +1613,7 @@ class APIWrapper:
             return ""
 
         # Remove markdown code blocks
-        curl_command = re.sub(r"```(?:bash|sh|shell)?\s*", "", curl_command)
-        curl_command = re.sub(r"```\s*", "", curl_command)
+        curl_command = _CODE_FENCE_RE.sub("", curl_command)
 
         # Remove leading/trailing whitespace
         curl_command = curl_command.strip()
@@ -796,16 +1625,20 @@ class APIWrapper:
             "curl command:",
             "here's the curl:",
         ]
-        lower_cmd = curl_command.lower()
+        # Only the head is lowercased; 64 chars covers every known prefix
+        head = curl_command[:64].lower()
         for prefix in prefixes_to_remove:
-            if lower_cmd.startswith(prefix):
+            if head.startswith(prefix):
                 curl_command = curl_command[len(prefix) :].strip()
+                head = curl_command[:64].lower()
                 break
 
         # Ensure the command starts with 'curl'
-        if not curl_command.lower().startswith("curl"):
-            # Try to find 'curl' in the command
-            curl_index = curl_command.lower().find("curl")
+        if not head.startswith("curl"):
+            # Try to find 'curl' in the head first, then in the whole command
+            curl_index = head.find("curl")
+            if curl_index == -1:
+                curl_index = curl_command.lower().find("curl")
             if curl_index != -1:
                 curl_command = curl_command[curl_index:]
 
@@ -824,8 +1657,6 @@ class APIWrapper:
         Returns:
             Curl command with quotes converted for Windows
         """
-        import re
-
         # Simple approach: replace single quotes with double quotes
         # This works for most API calls where we have:
         #   curl -X GET 'https://...' -H 'Content-Type: application/json'
@@ -841,7 +1672,7 @@ class APIWrapper:
             return f'-d "{escaped_json}"'
 
         # Replace -d 'json' patterns
-        result = re.sub(r"-d\s+'([^']*)'", replace_json_data, curl_command)
+        result = _SINGLE_QUOTED_DATA_RE.sub(replace_json_data, curl_command)
 
         # Replace remaining single quotes with double quotes (for URLs, headers, etc.)
         result = result.replace("'", '"')
@@ -850,7 +1681,8 @@ class APIWrapper:
 
     def _execute_curl(self, curl_command: str) -> dict:
         """
-        Execute curl command via subprocess.
+        Execute curl command via the pooled session, or via subprocess when
+        the command uses flags or shell syntax _parse_curl does not handle.
 
         Args:
             curl_command (str): The curl command to execute
@@ -870,210 +1702,744 @@ class APIWrapper:
             result["error"] = "Empty curl command"
             return result
 
-        # Modify curl to include -w for status code and -s for silent mode
-        # Also add -k for SSL bypass if not already present
-        modified_curl = curl_command
+        # Plain curl lines go through the pooled session (no process, keep-alive)
+        request_args = self._parse_curl(self._tokenize_curl(curl_command))
+        if request_args is not None:
+            return self._send_curl_request(request_args, result)
 
-        # On Windows, convert single quotes to double quotes for cmd.exe compatibility
-        is_windows = platform.system().lower() == "windows"
-        if is_windows:
-            # Replace single quotes with double quotes, but be careful with nested quotes
-            # First, escape any existing double quotes inside single-quoted strings
-            # Then replace single quotes with double quotes
-            modified_curl = self._convert_quotes_for_windows(modified_curl)
+        modified_curl, argv = self._prepare_curl_command(curl_command)
+
+        log.safe_print(f"[DEBUG] Executing: {modified_curl[:200]}...")
+
+        # Raw bytes: _fill_curl_result peels the status off before decoding
+        popen_kwargs = {"stdout": subprocess.PIPE, "stderr": subprocess.PIPE}
+        if not self._is_windows:
+            # Own process group, so a timeout can kill bash and its children
+            popen_kwargs["start_new_session"] = True
+
+        try:
+            process = None
+            if argv is not None:
+                # No shell: one process instead of shell + curl
+                try:
+                    process = subprocess.Popen(argv, **popen_kwargs)
+                except FileNotFoundError:
+                    modified_curl = self._shell_fallback_command(argv)
+
+            if process is None and self._is_windows:
+                # On Windows, use cmd.exe
+                process = subprocess.Popen(modified_curl, shell=True, **popen_kwargs)
+            elif process is None:
+                # On Linux/Mac, use bash
+                process = subprocess.Popen(["bash", "-c", modified_curl], **popen_kwargs)
+
+            try:
+                stdout, stderr = process.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                # Don't leave the curl process running; drain its pipes
+                self._kill_curl_process(process)
+                process.communicate()
+                raise
+
+            self._fill_curl_result(result, stdout, stderr, process.returncode)
+
+        except subprocess.TimeoutExpired:
+            result["error"] = f"Curl command timed out after {self.timeout} seconds"
+        except Exception as e:
+            result["error"] = f"Error executing curl: {str(e)}"
 
-        if "-k" not in modified_curl:
-            # Add -k after 'curl'
-            modified_curl = modified_curl.replace("curl ", "curl -k ", 1)
+        return result
 
-        # Add -w to get status code and -s for silent progress
-        if "-w" not in modified_curl:
-            modified_curl += ' -w "\\n%{http_code}"'
-        if "-s" not in modified_curl:
-            modified_curl = modified_curl.replace("curl ", "curl -s ", 1)
+    async def _execute_curl_async(self, curl_command: str) -> dict:
+        """
+        Async variant of _execute_curl, used by run_batch.
 
+        Session-eligible commands run in a worker thread; the rest run curl
+        via asyncio subprocesses, which are killed on timeout.
+        """
+        result = {
+            "success": False,
+            "stdout": "",
+            "stderr": "",
+            "status_code": None,
+            "error": None,
+        }
+
+        if not curl_command:
+            result["error"] = "Empty curl command"
+            return result
+
+        request_args = self._parse_curl(self._tokenize_curl(curl_command))
+        if request_args is not None:
+            return await asyncio.to_thread(
+                self._send_curl_request, request_args, result
+            )
+
+        modified_curl, argv = self._prepare_curl_command(curl_command)
         log.safe_print(f"[DEBUG] Executing: {modified_curl[:200]}...")
 
         try:
-            # Determine shell based on platform
-            is_windows = platform.system().lower() == "windows"
+            proc = None
+            if argv is not None:
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        *argv,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        start_new_session=not self._is_windows,
+                    )
+                except FileNotFoundError:
+                    modified_curl = self._shell_fallback_command(argv)
 
-            if is_windows:
-                # On Windows, use cmd.exe
-                process = subprocess.run(
+            if proc is None and self._is_windows:
+                proc = await asyncio.create_subprocess_shell(
                     modified_curl,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout,
-                    encoding="utf-8",
-                    errors="replace",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
                 )
-            else:
-                # On Linux/Mac, use bash
-                process = subprocess.run(
-                    ["bash", "-c", modified_curl],
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout,
-                    encoding="utf-8",
-                    errors="replace",
+            elif proc is None:
+                proc = await asyncio.create_subprocess_exec(
+                    "bash",
+                    "-c",
+                    modified_curl,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
                 )
+        except Exception as e:
+            result["error"] = f"Error executing curl: {str(e)}"
+            return result
 
-            result["stdout"] = process.stdout.strip()
-            result["stderr"] = process.stderr.strip()
-
-            # Extract status code from the last line (added by -w)
-            if result["stdout"]:
-                lines = result["stdout"].split("\n")
-                if lines:
-                    last_line = lines[-1].strip()
-                    if last_line.isdigit():
-                        result["status_code"] = int(last_line)
-                        # Remove status code from response body
-                        result["stdout"] = "\n".join(lines[:-1]).strip()
-
-            # Check for curl errors
-            if process.returncode != 0 and not result["stdout"]:
-                result["error"] = (
-                    f"Curl returned exit code {process.returncode}: {result['stderr']}"
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            # Don't leave the curl process running after we stop waiting
+            self._kill_curl_process(proc)
+            await proc.wait()
+            result["error"] = f"Curl command timed out after {self.timeout} seconds"
+            return result
+
+        self._fill_curl_result(result, stdout, stderr, proc.returncode)
+        return result
+
+    def _shell_fallback_command(self, argv: list) -> str:
+        """
+        Quote argv for the platform shell after a direct exec found no curl.
+
+        curl may only be reachable through the shell (e.g. a PATH entry set
+        up by a profile or cmd.exe lookup rules), so retry once that way.
+        """
+        log.warning("curl executable not found for direct exec, retrying via shell")
+        if self._is_windows:
+            return subprocess.list2cmdline(argv)
+        return shlex.join(argv)
+
+    def _kill_curl_process(self, process) -> None:
+        """Kill a timed-out curl process (and its process group on POSIX)."""
+        try:
+            if self._is_windows:
+                process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def run_batch(self, curl_commands: list, max_parallel: int = None) -> list:
+        """
+        Execute independent curl commands concurrently.
+
+        Args:
+            curl_commands: List of curl command strings
+            max_parallel: Max commands in flight (default: CONFIG["max_parallel"] or 8)
+
+        Returns:
+            list: One _execute_curl-style result dict per command, in input order
+        """
+        if max_parallel is None:
+            max_parallel = self.config.get("max_parallel", 8)
+
+        async def _run_all():
+            semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+            async def _run_one(curl_command):
+                async with semaphore:
+                    return await self._execute_curl_async(curl_command)
+
+            return await asyncio.gather(*(_run_one(c) for c in curl_commands))
+
+        return asyncio.run(_run_all())
+
+    def build_batch_curl(
+        self,
+        argvs: list,
+        output_paths: list,
+        max_parallel: int = None,
+        config_path: str = None,
+    ) -> list:
+        """
+        Combine several curl argvs into one `curl --parallel` argv.
+
+        Each transfer writes its body to its own output file and a
+        "<http_code> <exitcode> <index>" line to stdout, so results can be
+        matched back to their commands even though transfers finish out of
+        order.
+
+        With config_path, the transfers are written to that file and passed
+        with -K, which keeps large batches under the command line length
+        limit and keeps auth headers out of the process list. Options that
+        can't be translated fall back to the inline argv.
+
+        Args:
+            argvs: Tokenized curl commands (argv[0] == "curl")
+            output_paths: Body output file for each command
+            max_parallel: Max transfers in flight (default: CONFIG["max_parallel"] or 8)
+            config_path: Optional -K config file to write the transfers to
+
+        Returns:
+            list: argv for a single curl process
+        """
+        if max_parallel is None:
+            max_parallel = self.config.get("max_parallel", 8)
+        max_time = str(max(1, self.timeout - 1))
+
+        batch = [
+            "curl",
+            "--parallel",
+            "--parallel-immediate",
+            "--parallel-max",
+            str(max(1, max_parallel)),
+            # -s doesn't silence the combined --parallel progress meter
+            "--no-progress-meter",
+        ]
+        transfers = []
+        for index, (argv, output_path) in enumerate(zip(argvs, output_paths)):
+            if index:
+                transfers.append("--next")
+            # Per-transfer options are reset by --next, so repeat them
+            transfers += argv[1:]
+            transfers += ["-k", "--max-time", max_time, "-o", output_path]
+            if self.max_body_bytes:
+                transfers += ["--max-filesize", str(self.max_body_bytes)]
+            transfers += ["-w", f"%{{http_code}} %{{exitcode}} {index}\\n"]
+
+        lines = _curl_config_lines(transfers) if config_path else None
+        if lines is None:
+            return batch + transfers
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            config_file.write("\n".join(lines) + "\n")
+        return batch + ["-K", config_path]
+
+    def run_batch_curl(self, curl_commands: list, max_parallel: int = None) -> list:
+        """
+        Execute curl commands as transfers of one `curl --parallel` process.
+
+        Transfers to the same host share curl's connection pool (and one
+        multiplexed connection where HTTP/2 is negotiated), instead of each
+        command paying its own TCP/TLS setup. Commands that need a shell or
+        set their own output options run individually via _execute_curl.
+
+        Returns:
+            list: One _execute_curl-style result dict per command, in input order
+        """
+        results = [None] * len(curl_commands)
+        batched = []
+        for index, curl_command in enumerate(curl_commands):
+            argv = self._tokenize_curl(curl_command) if curl_command else None
+            if argv is None or _CURL_OUTPUT_FLAGS.intersection(argv):
+                results[index] = self._execute_curl(curl_command)
+            else:
+                batched.append((index, argv))
+
+        if not batched:
+            return results
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            output_paths = [
+                os.path.join(out_dir, f"{index}.body") for index, _ in batched
+            ]
+            batch = self.build_batch_curl(
+                [argv for _, argv in batched],
+                output_paths,
+                max_parallel,
+                config_path=os.path.join(out_dir, "batch.cfg"),
+            )
+            log.safe_print(
+                f"[DEBUG] Executing {len(batched)} curl transfers in one process"
+            )
+
+            transfers = {}
+            error = None
+            popen_kwargs = {"stdout": subprocess.PIPE, "stderr": subprocess.PIPE}
+            if not self._is_windows:
+                popen_kwargs["start_new_session"] = True
+            try:
+                process = subprocess.Popen(batch, **popen_kwargs)
+                try:
+                    stdout, stderr = process.communicate(
+                        timeout=self.timeout * len(batched)
+                    )
+                except subprocess.TimeoutExpired:
+                    self._kill_curl_process(process)
+                    process.communicate()
+                    raise
+                for line in stdout.decode("utf-8", errors="replace").splitlines():
+                    fields = line.split()
+                    if len(fields) == 3 and all(f.isdigit() for f in fields):
+                        code, exit_code, position = map(int, fields)
+                        transfers[position] = (code, exit_code)
+                stderr_text = stderr.decode("utf-8", errors="replace").strip()
+            except subprocess.TimeoutExpired:
+                error = f"Curl command timed out after {self.timeout} seconds"
+            except Exception as e:
+                error = f"Error executing curl: {str(e)}"
+
+            for position, (index, _) in enumerate(batched):
+                result = {
+                    "success": False,
+                    "stdout": "",
+                    "stderr": "",
+                    "status_code": None,
+                    "error": error,
+                }
+                if error is None:
+                    try:
+                        with open(output_paths[position], "rb") as body_file:
+                            result["stdout"] = (
+                                body_file.read()
+                                .decode("utf-8", errors="replace")
+                                .strip()
+                            )
+                    except OSError:
+                        pass
+                    status_code, exit_code = transfers.get(
+                        position, (0, process.returncode)
+                    )
+                    if status_code:
+                        result["status_code"] = status_code
+                    if exit_code == _CURL_EXIT_FILESIZE:
+                        result["error"] = (
+                            "Response body exceeds max_body_bytes "
+                            f"({self.max_body_bytes} bytes)"
+                        )
+                    elif status_code:
+                        result["success"] = True
+                    else:
+                        # stderr is shared by all transfers; attach it to failures
+                        result["stderr"] = stderr_text
+                        result["error"] = (
+                            f"Curl transfer failed (exit code {exit_code}): "
+                            f"{stderr_text}"
+                        )
+                results[index] = result
+
+        return results
+
+    def _prepare_curl_command(self, curl_command: str) -> tuple:
+        """
+        Add -k/-s/--max-time and the -w status line _fill_curl_result relies on.
+
+        Returns:
+            tuple: (modified_curl, argv) - argv is None when a shell is needed
+        """
+        max_time = str(max(1, self.timeout - 1))
+
+        # Plain commands: patch the argv list, checking real flags only
+        argv = self._tokenize_curl(curl_command)
+        if argv is not None:
+            flags = _curl_flags(argv[1:])
+        else:
+            # Shell syntax: check the tokens of the curl segment (up to the
+            # first pipe/redirect/chain operator) instead of substrings
+            lexer = shlex.shlex(curl_command, posix=True, punctuation_chars=True)
+            lexer.whitespace_split = True
+            try:
+                flags = _curl_flags(
+                    itertools.takewhile(
+                        lambda token: not set(token) <= _SHELL_OPERATOR_CHARS, lexer
+                    )
                 )
+            except ValueError:
+                flags = set()
+
+        extra = []
+        if not flags & {"-s", "--silent"}:
+            extra.append("-s")
+        # Let curl give up on its own just before our timeout
+        if not flags & {"-m", "--max-time"}:
+            extra += ["--max-time", max_time]
+        if not flags & {"-k", "--insecure"}:
+            extra.append("-k")
+        if self.max_body_bytes and "--max-filesize" not in flags:
+            extra += ["--max-filesize", str(self.max_body_bytes)]
+
+        if argv is not None:
+            argv[1:1] = extra
+            if not flags & {"-w", "--write-out"}:
+                argv += ["-w", "\\n%{http_code}"]
+            return shlex.join(argv), argv
+
+        # Shell syntax: insert right after "curl" so nothing lands after a pipe
+        if not flags & {"-w", "--write-out"}:
+            extra += ["-w", '"\\n%{http_code}"']
+        modified_curl = curl_command
+        if extra:
+            modified_curl = modified_curl.replace(
+                "curl ", f"curl {' '.join(extra)} ", 1
+            )
+
+        if self._is_windows:
+            # On Windows, convert single quotes to double quotes for cmd.exe compatibility
+            modified_curl = self._convert_quotes_for_windows(modified_curl)
+
+        return modified_curl, None
+
+    def _fill_curl_result(
+        self, result: dict, stdout: bytes, stderr: bytes, returncode: int
+    ) -> None:
+        """
+        Split the -w status code off curl's raw output and fill result in place.
+
+        The status is peeled off the bytes, so only the body is decoded.
+        """
+        # Extract status code from the last line (added by -w)
+        stdout = stdout.strip()
+        body, _, last_line = stdout.rpartition(b"\n")
+        last_line = last_line.strip()
+        if _STATUS_CODE_RE.fullmatch(last_line):
+            result["status_code"] = int(last_line)
+            # Remove status code from response body
+            stdout = body
+
+        result["stdout"] = stdout.decode("utf-8", errors="replace").strip()
+        result["stderr"] = stderr.decode("utf-8", errors="replace").strip()
+
+        # Check for curl errors
+        if returncode == _CURL_EXIT_FILESIZE:
+            result["error"] = (
+                f"Response body exceeds max_body_bytes ({self.max_body_bytes} bytes)"
+            )
+        elif returncode != 0 and not result["stdout"]:
+            result["error"] = f"Curl returned exit code {returncode}: {result['stderr']}"
+        else:
+            result["success"] = True
+
+    def _tokenize_curl(self, curl_command: str) -> list:
+        """
+        Split a curl command into an argv list for execution without a shell.
+
+        Returns:
+            list: argv, or None if the command needs a shell (pipes, redirects,
+                  command chaining, $ expansion) or cannot be tokenized
+        """
+        if ("$" in curl_command or "`" in curl_command) and _has_shell_expansion(
+            curl_command
+        ):
+            return None
+
+        # Drop backslash line continuations before tokenizing
+        lexer = shlex.shlex(
+            curl_command.replace("\\\n", " "), posix=True, punctuation_chars=True
+        )
+        lexer.whitespace_split = True
+        try:
+            argv = list(lexer)
+        except ValueError:
+            return None
+
+        if not argv or argv[0] != "curl":
+            return None
+
+        # Unquoted shell operators come out as punctuation-only tokens
+        if any(set(token) <= _SHELL_OPERATOR_CHARS for token in argv if token):
+            return None
+        return argv
+
+    def _parse_curl(self, argv: list) -> dict:
+        """
+        Translate a tokenized curl command into requests.Session.request kwargs.
+
+        Only the flags LLM-generated commands normally use are understood
+        (-X, -H, -d/--data*, --data-urlencode, --json, -G, -u, -A, -e, -b,
+        --url, --cacert and output-only switches). Anything else returns None
+        so the command runs through the curl binary instead.
+
+        Returns:
+            dict: method, url, headers, data, auth, allow_redirects - or None.
+                  A header curl would remove ("-H 'Name:'") maps to None
+        """
+        if not argv:
+            return None
+
+        method = None
+        url = None
+        headers = {}
+        data = []
+        auth = None
+        allow_redirects = False
+        as_query = False
+        json_body = False
+
+        tokens = iter(argv[1:])
+        for token in tokens:
+            if not token.startswith("-"):
+                if url is not None:
+                    return None
+                url = token
+            elif token in _CURL_BOOL_FLAGS or (
+                len(token) > 1
+                and token[1] != "-"
+                and set(token[1:]) <= _CURL_BOOL_SHORT
+            ):
+                short = token[1] != "-"
+                if token == "--location" or (short and "L" in token):
+                    allow_redirects = True
+                if token == "--get" or (short and "G" in token):
+                    as_query = True
+            elif token.startswith("-X") and len(token) > 2:
+                method = token[2:]
+            elif token in _CURL_VALUE_FLAGS:
+                value = next(tokens, None)
+                if value is None:
+                    return None
+                flag = _CURL_VALUE_FLAGS[token]
+                if flag == "method":
+                    method = value
+                elif flag == "header":
+                    name, sep, header_value = value.partition(":")
+                    name = name.strip()
+                    if not sep or not name:
+                        return None
+                    # "Name:" removes the header, as curl does; requests drops
+                    # None-valued headers, including session defaults
+                    headers[name] = header_value.strip() or None
+                elif flag == "user":
+                    if ":" not in value:
+                        return None
+                    auth = tuple(value.split(":", 1))
+                elif flag == "cacert":
+                    # Certificates are not verified on either path (curl gets -k)
+                    pass
+                elif flag == "url":
+                    if url is not None:
+                        return None
+                    url = value
+                elif flag == "user-agent":
+                    headers["User-Agent"] = value
+                elif flag == "referer":
+                    headers["Referer"] = value
+                elif flag == "cookie":
+                    # Without "=" the value is a cookie file name
+                    if "=" not in value:
+                        return None
+                    cookie = headers.get("Cookie")
+                    headers["Cookie"] = f"{cookie}; {value}" if cookie else value
+                elif flag == "json":
+                    if value.startswith("@"):
+                        return None
+                    json_body = True
+                    data.append(value)
+                elif flag == "data-urlencode":
+                    # "content", "=content" or "name=content"; name@file needs curl
+                    name, sep, content = value.partition("=")
+                    if not sep:
+                        if "@" in value:
+                            return None
+                        name, content = "", value
+                    encoded = quote(content, safe="")
+                    data.append(f"{name}={encoded}" if name else encoded)
+                else:
+                    if flag != "data-raw" and value.startswith("@"):
+                        return None
+                    if flag == "data":
+                        value = value.replace("\r", "").replace("\n", "")
+                    data.append(value)
             else:
-                result["success"] = True
+                return None
 
-        except subprocess.TimeoutExpired:
+        if url is None:
+            return None
+        if "://" not in url:
+            url = f"http://{url}"
+
+        body = None
+        if data and as_query:
+            # -G: send the data as the query string of a GET
+            url += ("&" if "?" in url else "?") + "&".join(data)
+        elif data:
+            if not method:
+                method = "POST"
+            header_names = {name.lower() for name in headers}
+            if json_body:
+                if "content-type" not in header_names:
+                    headers["Content-Type"] = "application/json"
+                if "accept" not in header_names:
+                    headers["Accept"] = "application/json"
+            elif "content-type" not in header_names:
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            body = ("" if json_body else "&").join(data).encode("utf-8")
+
+        return {
+            "method": (method or "GET").upper(),
+            "url": url,
+            "headers": headers,
+            "data": body,
+            "auth": auth,
+            "allow_redirects": allow_redirects,
+        }
+
+    def _send_curl_request(self, request_args: dict, result: dict) -> dict:
+        """Send a parsed curl command through the curl session and fill result."""
+        log.safe_print(
+            "[DEBUG] Executing (session): %s %s",
+            request_args["method"],
+            request_args["url"][:200],
+        )
+        limit = self.max_body_bytes
+        try:
+            response = self._curl_session.request(
+                timeout=self.timeout, stream=bool(limit), **request_args
+            )
+            if limit:
+                # Stop reading once the body passes the cap, like --max-filesize
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    body += chunk
+                    if len(body) > limit:
+                        response.close()
+                        result["error"] = (
+                            f"Response body exceeds max_body_bytes ({limit} bytes)"
+                        )
+                        return result
+            else:
+                body = response.content
+        except requests.Timeout:
             result["error"] = f"Curl command timed out after {self.timeout} seconds"
-        except Exception as e:
+            return result
+        except requests.RequestException as e:
             result["error"] = f"Error executing curl: {str(e)}"
+            return result
 
+        # Decode once; response.text would run charset detection over the
+        # whole body when the server sends no charset (typical for JSON)
+        try:
+            text = body.decode(response.encoding or "utf-8", errors="replace")
+        except LookupError:
+            text = body.decode("utf-8", errors="replace")
+
+        result["stdout"] = text.strip()
+        result["status_code"] = response.status_code
+        result["success"] = True
         return result
 
     def _print_execution_summary(self, result: dict, logger: IntentLogger = None):
         """Print a comprehensive summary of the execution result with full logs."""
 
-        # Use logger if provided, otherwise just print
-        def log(msg):
-            if logger:
-                logger.log(msg)
-            else:
-                log.safe_print(msg)
+        # Skip all formatting when nothing would be written
+        if logger is not None:
+            if not logger.is_enabled():
+                return
+        elif not log.is_enabled_for(logging.INFO):
+            return
+
+        # Collect all lines and write them once (one print/flush, not ~100)
+        buf = []
+        emit = buf.append
 
-        log(f"\n{'='*80}")
-        log(f"{'='*80}")
-        log(f"                    >> FULL EXECUTION SUMMARY <<")
-        log(f"{'='*80}")
-        log(f"{'='*80}")
+        emit("\n" + _DOUBLE_EQ)
+        emit(_DOUBLE_EQ)
+        emit(_BANNER_SUMMARY)
+        emit(_DOUBLE_EQ)
+        emit(_DOUBLE_EQ)
 
         # Intent & Config
-        log(f"\n+{'-'*78}+")
-        log(
-            f"| >> INTENT & CONFIGURATION                                                    |"
-        )
-        log(f"+{'-'*78}+")
-        log(f"| Intent: {result['intent'][:68]:<68} |")
-        log(f"| Base URL: {result['base_url'][:66]:<66} |")
-        log(f"| Retries Used: {result['retries']:<62} |")
-        log(f"+{'-'*78}+")
+        emit("\n" + _HLINE)
+        emit(_FMT_ROW(">> INTENT & CONFIGURATION"))
+        emit(_HLINE)
+        emit(_FMT_INTENT(result["intent"][:68]))
+        emit(_FMT_BASE_URL(result["base_url"][:66]))
+        emit(_FMT_RETRIES(result["retries"]))
+        emit(_HLINE)
 
         # Curl Command
-        log(f"\n+{'-'*78}+")
-        log(
-            f"| >> GENERATED CURL COMMAND                                                    |"
-        )
-        log(f"+{'-'*78}+")
+        emit("\n" + _HLINE)
+        emit(_FMT_ROW(">> GENERATED CURL COMMAND"))
+        emit(_HLINE)
         if result["curl_command"]:
             # Split long curl commands for display
-            curl_lines = [
-                result["curl_command"][i : i + 76]
-                for i in range(0, len(result["curl_command"]), 76)
-            ]
-            for line in curl_lines[:10]:  # Limit to 10 lines
-                log(f"| {line:<76} |")
-            if len(curl_lines) > 10:
-                log(f"| {'... (truncated)':<76} |")
+            for line in _chunks(result["curl_command"], 76, 10):  # Limit to 10 lines
+                emit(_FMT_ROW(line))
+            if len(result["curl_command"]) > 76 * 10:
+                emit(_FMT_ROW("... (truncated)"))
         else:
-            log(f"| {'No curl command generated':<76} |")
-        log(f"+{'-'*78}+")
+            emit(_FMT_ROW("No curl command generated"))
+        emit(_HLINE)
 
         # API Response
-        log(f"\n+{'-'*78}+")
-        log(
-            f"| >> API RESPONSE                                                              |"
-        )
-        log(f"+{'-'*78}+")
-        log(f"| Status Code: {str(result['status_code']):<63} |")
-        log(f"| Success: {'[OK] Yes' if result['success'] else '[FAIL] No':<68} |")
-        log(f"+{'-'*78}+")
-        log(
-            f"| Response Body:                                                               |"
-        )
+        emit("\n" + _HLINE)
+        emit(_FMT_ROW(">> API RESPONSE"))
+        emit(_HLINE)
+        emit(_FMT_STATUS(str(result["status_code"])))
+        emit(_FMT_SUCCESS("[OK] Yes" if result["success"] else "[FAIL] No"))
+        emit(_HLINE)
+        emit(_FMT_ROW("Response Body:"))
         if result["response_body"]:
             # Pretty print JSON if possible
-            try:
-                resp_json = json.loads(result["response_body"])
-                resp_formatted = json.dumps(resp_json, indent=2)
-                resp_lines = resp_formatted.split("\n")
+            resp_formatted = self._pretty_response_body(result)
+            if resp_formatted is not None:
+                resp_lines = resp_formatted.split("\n", 30)
                 for line in resp_lines[:30]:  # Limit to 30 lines
-                    log(f"|   {line[:74]:<74} |")
+                    emit(_FMT_INDENTED_ROW(line[:74]))
                 if len(resp_lines) > 30:
-                    log(
-                        f"|   {'... (truncated - ' + str(len(resp_lines) - 30) + ' more lines)':<74} |"
-                    )
-            except:
-                # Not JSON, show as text
-                resp_lines = [
-                    result["response_body"][i : i + 74]
-                    for i in range(0, min(len(result["response_body"]), 2000), 74)
-                ]
-                for line in resp_lines[:20]:
-                    log(f"|   {line:<74} |")
-                if len(result["response_body"]) > 2000:
-                    log(f"|   {'... (truncated)':<74} |")
+                    more = resp_formatted.count("\n") - 29
+                    emit(_FMT_INDENTED_ROW(_FMT_MORE_LINES(more)))
+            else:
+                # Not JSON, show as text (only the displayed prefix is sliced)
+                for line in _chunks(result["response_body"], 74, 20):
+                    emit(_FMT_INDENTED_ROW(line))
+                if len(result["response_body"]) > 74 * 20:
+                    emit(_FMT_INDENTED_ROW("... (truncated)"))
         else:
-            log(f"|   {'(empty response)':<74} |")
-        log(f"+{'-'*78}+")
+            emit(_FMT_INDENTED_ROW("(empty response)"))
+        emit(_HLINE)
 
         # Error (if any)
         if result["error"]:
-            log(f"\n+{'-'*78}+")
-            log(
-                f"| [ERROR]                                                                      |"
-            )
-            log(f"+{'-'*78}+")
-            error_lines = [
-                result["error"][i : i + 76] for i in range(0, len(result["error"]), 76)
-            ]
-            for line in error_lines[:5]:
-                log(f"| {line:<76} |")
-            log(f"+{'-'*78}+")
+            emit("\n" + _HLINE)
+            emit(_FMT_ROW("[ERROR]"))
+            emit(_HLINE)
+            for line in _chunks(result["error"], 76, 5):
+                emit(_FMT_ROW(line))
+            emit(_HLINE)
 
         # AI Analysis
-        log(f"\n+{'-'*78}+")
-        log(
-            f"| [AI] GITLAB DUO ANALYSIS                                                     |"
-        )
-        log(f"+{'-'*78}+")
+        emit("\n" + _HLINE)
+        emit(_FMT_ROW("[AI] GITLAB DUO ANALYSIS"))
+        emit(_HLINE)
         if result["analysis"]:
             # Handle both dict and string analysis
             if isinstance(result["analysis"], dict):
-                analysis_text = json.dumps(result["analysis"], indent=2)
+                analysis_text = json_dumps_pretty(result["analysis"])
             else:
                 analysis_text = str(result["analysis"])
-            analysis_lines = analysis_text.split("\n")
+            # Split off at most 40 lines; the remainder is only counted
+            analysis_lines = analysis_text.split("\n", 40)
             for line in analysis_lines[:40]:  # Limit to 40 lines
-                log(f"| {line[:76]:<76} |")
+                emit(_FMT_ROW(line[:76]))
             if len(analysis_lines) > 40:
-                log(
-                    f"| {'... (truncated - ' + str(len(analysis_lines) - 40) + ' more lines)':<76} |"
-                )
+                emit(_FMT_ROW(_FMT_MORE_LINES(analysis_text.count("\n") - 39)))
         else:
-            log(f"| {'No analysis available':<76} |")
-        log(f"+{'-'*78}+")
+            emit(_FMT_ROW("No analysis available"))
+        emit(_HLINE)
 
         # Final Result
-        log(f"\n{'='*80}")
-        if result["success"]:
-            log(f"                         [OK] TEST PASSED [OK]")
+        emit("\n" + _DOUBLE_EQ)
+        emit(_BANNER_PASS if result["success"] else _BANNER_FAIL)
+        emit(_DOUBLE_EQ)
+
+        summary = "\n".join(buf)
+        if logger:
+            logger.log(summary)
         else:
-            log(f"                         [FAIL] TEST FAILED [FAIL]")
-        log(f"{'='*80}")
+            log.safe_print(summary)
@@ -1,12 +1,23 @@
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import Error as PlaywrightError
 from Logic.API.api_wrapper import APIWrapper
 from Libs.IntentLocatorLibrary import IntentLocatorLibrary
-from Utils.logger import IntentLogger
+from Utils.logger import FrameworkLogger as log, IntentLogger
+import bisect
 import builtins
+import collections
+import copy
+import functools
+import hashlib
+import itertools
+import logging
 import re
 import json
+import sys
+import threading
 import time
 import fnmatch
+import weakref
 
 
 class BasePage:
@@ -40,12 +51,30 @@ class BasePage:
         self.retry_interval = self.config.get("retry_interval", 1)
         self.agent_mode = self.config.get("agent_mode", "ENABLED")
         self.timeout = self.config.get("timeout", 5000)
-
-        # Network interception storage
-        self._captured_requests = []
-        self._captured_responses = []
+        self.duo_cache_ttl = self.config.get("duo_cache_ttl", 3600)
+
+        # Network interception storage, bounded so long captures keep only
+        # the most recent entries
+        max_captured = self.config.get("max_captured_requests", 10_000)
+        self._captured_requests = collections.deque(maxlen=max_captured)
+        self._captured_responses = collections.deque(maxlen=max_captured)
+        # URL columns parallel to the deques above (same maxlen, so they evict
+        # in lockstep); URL filters scan these instead of every record dict
+        self._captured_request_urls = collections.deque(maxlen=max_captured)
+        self._captured_response_urls = collections.deque(maxlen=max_captured)
+        # url -> the same string, so records for one URL share one object.
+        # A plain dict (not sys.intern, whose strings may never be freed),
+        # emptied when it outgrows the capture limit
+        self._captured_url_pool = {}
         self._network_listener_active = False
 
+        # Kept across steps so an unchanged DOM is parsed only once
+        self._intent_locator = IntentLocatorLibrary()
+
+        # Last fetched page HTML, keyed by the DOM version it was read at
+        self._html_cache = (None, "")
+        self._navigations = self._navigation_counter(self.page)
+
     def prepare_element(self, locator, timeout=None):
         """
         Waits for element to be attached, visible, and stable.
@@ -54,11 +83,8 @@ class BasePage:
         timeout = timeout if timeout is not None else self.timeout
         print(f"Preparing element: {locator}")
         try:
-            # Wait for attached
-            self.page.wait_for_selector(locator, state="attached", timeout=timeout)
-            # Wait for visible
-            self.page.wait_for_selector(locator, state="visible", timeout=timeout)
-            # Wait for stable
+            # One round trip: "visible" implies attached, and the locator is
+            # strict, so it fails like before if the selector is ambiguous
             self.page.locator(locator).wait_for(state="visible", timeout=timeout)
             return True
         except PlaywrightTimeoutError:
@@ -93,7 +119,7 @@ class BasePage:
                         context="SELF_HEALING",
                         locator_name=var_name,
                         locator_value=locator,
-                        html_content=self.page.content(),
+                        html_content=self._get_page_html(),
                     )
 
                     print(f"AI Agent suggested: {new_locator}")
@@ -175,9 +201,137 @@ class BasePage:
     # Actions that mark HTML as dirty (need refresh)
     DIRTY_ACTIONS = {"navigate", "click"}
 
+    # Recent UI_MODULE_ACTION responses whose action succeeded, shared across
+    # pages: prompt digest -> (monotonic time stored, response)
+    _DUO_CACHE = collections.OrderedDict()
+    _DUO_CACHE_LOCK = threading.Lock()
+    _DUO_CACHE_SIZE = 128
+
+    # Navigation counters shared by every BasePage on a page: page -> [count]
+    _NAVIGATION_COUNTS = weakref.WeakKeyDictionary()
+
+    # Resource types network capture skips unless capture_static is set
+    STATIC_RESOURCE_TYPES = frozenset({"image", "font", "stylesheet", "media"})
+
+    # Response content types whose bodies network capture reads immediately
+    # (the browser may drop them after a navigation); others are read lazily
+    _TEXT_CONTENT_TYPE_RE = re.compile(
+        r"^\s*text/|json|javascript|xml|x-www-form-urlencoded", re.IGNORECASE
+    )
+
+    # Actions handled by _execute_network_action
+    NETWORK_ACTIONS = frozenset(
+        {"start_capture", "stop_capture", "validate_api", "clear_capture"}
+    )
+
+    # action_type -> name of the handler method _execute_action calls, looked
+    # up on the instance so subclass overrides are honoured
+    _ACTION_HANDLERS = {
+        "navigate": "_do_navigate",
+        "click": "_do_click",
+        "fill": "_do_fill",
+        "select": "_do_select",
+        "verify": "_execute_verification",
+        "wait": "_do_wait",
+        "hover": "_do_hover",
+        # Network interception actions
+        **dict.fromkeys(NETWORK_ACTIONS, "_execute_network_action"),
+    }
+
     # Maximum retry attempts (Trial 1: RAG, Trial 2: Live HTML)
     MAX_TRIALS = 2
 
+    # Gherkin step line: Given/When/Then/And followed by step text
+    _GHERKIN_RE = re.compile(r"^\s*(given|when|then|and)\s+(.+)$", re.IGNORECASE)
+    _GHERKIN_PREFIXES = ("given", "when", "then", "and")
+
+    # Step keywords per action type, in the priority order they are checked
+    _ACTION_KEYWORDS = (
+        ("navigate", ("navigate", "go to", "open", "visit", "am on")),
+        ("click", ("click", "press", "tap", "submit")),
+        ("fill", ("fill", "enter", "type", "input", "write")),
+        ("select", ("select", "choose", "pick", "dropdown")),
+        (
+            "verify",
+            ("verify", "assert", "check", "see", "should", "visible", "displayed"),
+        ),
+        ("wait", ("wait",)),
+        ("hover", ("hover",)),
+        (
+            "network",
+            (
+                "start capturing",
+                "intercept",
+                "monitor network",
+                "start network",
+                "listen to",
+                "validate api",
+                "api called",
+                "api returned",
+                "check api",
+                "verify api",
+                "network call",
+                "stop capturing",
+                "stop network",
+            ),
+        ),
+    )
+    _ACTION_RE = re.compile(
+        "(?=%s)"
+        % "|".join(
+            f"(?P<{action}>{'|'.join(map(re.escape, keywords))})"
+            for action, keywords in _ACTION_KEYWORDS
+        )
+    )
+    _ACTION_PRIORITY = {
+        action: priority for priority, (action, _) in enumerate(_ACTION_KEYWORDS)
+    }
+
+    # Serializes the page like page.content() and, in the same round trip,
+    # installs (once per document) and reads a DOM mutation counter
+    _CONTENT_WITH_VERSION_JS = """() => {
+        if (window.__e2eDomVersion === undefined) {
+            window.__e2eDomVersion = 0;
+            new MutationObserver(() => { window.__e2eDomVersion++; }).observe(
+                document,
+                {subtree: true, childList: true, attributes: true, characterData: true}
+            );
+        }
+        let html = "";
+        if (document.doctype) {
+            html = new XMLSerializer().serializeToString(document.doctype);
+        }
+        if (document.documentElement) {
+            html += document.documentElement.outerHTML;
+        }
+        return [window.__e2eDomVersion, html];
+    }"""
+
+    # Resolves once the DOM has had no mutation for 100 ms (or after timeout
+    # ms); the observer is disconnected before resolving
+    _DOM_SETTLE_JS = """timeout => new Promise(resolve => {
+        let quiet;
+        const done = () => {
+            observer.disconnect();
+            clearTimeout(quiet);
+            clearTimeout(limit);
+            resolve();
+        };
+        const observer = new MutationObserver(() => {
+            clearTimeout(quiet);
+            quiet = setTimeout(done, 100);
+        });
+        observer.observe(
+            document,
+            {subtree: true, childList: true, attributes: true, characterData: true}
+        );
+        quiet = setTimeout(done, 100);
+        const limit = setTimeout(done, timeout);
+    })"""
+
+    # (urls dict, flattened page_ref -> URL index), shared by all pages
+    _URL_INDEX = (None, {})
+
     def execute_by_intent(
         self, intent: str, rag_context=None, assert_success: bool = True
     ) -> dict:
@@ -233,8 +387,13 @@ class BasePage:
 
             logger.log(f"[PARSE] Found {len(steps)} steps to execute")
 
-            # Initialize IntentLocatorLibrary
-            intent_locator = IntentLocatorLibrary()
+            # module -> {intent: RAG query embedding}, batch-embedded for the
+            # remaining steps when a step first runs on that module
+            query_embeddings = {}
+
+            # (html hash, step intent, top_k) -> elements, for this call only;
+            # repeated steps on an unchanged DOM reuse the search
+            search_cache = {}
 
             # Execute each step
             previous_steps = []
@@ -269,12 +428,29 @@ class BasePage:
 
                     stored_metadata = None
                     relevant_elements = None
+                    html_content = None
                     source = "live_html"
 
                     # === STEP 2: Retrieve from ChromaDB ===
                     if not is_network_action and rag_context:
+                        if current_module not in query_embeddings:
+                            query_embeddings[current_module] = (
+                                rag_context.embed_ui_intent_queries(
+                                    current_module,
+                                    [
+                                        next_step["intent"]
+                                        for next_step in steps[step_idx:]
+                                        if self._guess_action_type(next_step["intent"])
+                                        != "network"
+                                    ],
+                                )
+                            )
                         rag_result = rag_context.retrieve_ui_action_for_intent(
-                            current_module, step_intent
+                            current_module,
+                            step_intent,
+                            query_embedding=query_embeddings[current_module].get(
+                                step_intent
+                            ),
                         )
 
                         if (
@@ -311,13 +487,12 @@ class BasePage:
                         html_content = self._get_page_html()
 
                         if html_content:
-                            relevant_elements = intent_locator.find_elements_outerhtml_with_score_backoff(
-                                html_or_path=html_content,
-                                intent_str=step_intent,
-                                top_k=top_k,
-                                start=0.5,
-                                min_floor=0.05,
+                            # Fetch enough for the retry path too; the first
+                            # top_k are the same elements a top_k query returns
+                            all_elements = self._search_elements(
+                                html_content, step_intent, top_k * 2, search_cache
                             )
+                            relevant_elements = all_elements[:top_k]
                             logger.log(
                                 f"[HTML] Found {len(relevant_elements)} relevant elements"
                             )
@@ -351,19 +526,26 @@ class BasePage:
                     # Log the prompt being sent
                     logger.log_duo_prompt(duo_prompt)
 
-                    # Now actually call DUO
-                    logger.log(f"\n[DUO] Sending to GitLab Duo...")
-
-                    duo_response = self.ai_agent.run_agent_based_on_context(
-                        context="UI_MODULE_ACTION",
-                        step_intent=step_intent,
-                        step_type=step_type,
-                        module=current_module,
-                        page_url=current_url,
-                        stored_metadata=stored_metadata,
-                        relevant_elements=relevant_elements,
-                        previous_steps=previous_steps,
-                    )
+                    # Reuse a recent action that worked for the identical prompt
+                    duo_key, duo_response = self._cached_duo_action(duo_prompt)
+                    if duo_response is not None:
+                        logger.log("\n[CACHE HIT] Action reused for identical prompt")
+                    else:
+                        # Now actually call DUO
+                        logger.log(f"\n[DUO] Sending to GitLab Duo...")
+
+                        # Send the prompt built above instead of rendering it again
+                        duo_response = self.ai_agent.run_agent_based_on_context(
+                            context="UI_MODULE_ACTION",
+                            step_intent=step_intent,
+                            step_type=step_type,
+                            module=current_module,
+                            page_url=current_url,
+                            stored_metadata=stored_metadata,
+                            relevant_elements=relevant_elements,
+                            previous_steps=previous_steps,
+                            prompt=duo_prompt,
+                        )
 
                     if not duo_response:
                         raise Exception("DUO failed to generate action metadata")
@@ -384,6 +566,7 @@ class BasePage:
 
                     logger.log(f"\n[EXECUTE] Executing action...")
                     success = self._execute_action(action_json, logger)
+                    self._remember_duo_action(duo_key, duo_response, success)
 
                     action_type = duo_response.get("action_type", "")
                     locator = duo_response.get("locator", "")
@@ -411,7 +594,7 @@ class BasePage:
 
                         # Mark HTML dirty if needed
                         if action_type in self.DIRTY_ACTIONS:
-                            time.sleep(0.5)  # Small wait for page to update
+                            self._wait_for_page_settle()
 
                     else:
                         # === ACTION FAILED ===
@@ -466,15 +649,12 @@ class BasePage:
                                     url=current_url,
                                 )
 
-                            # STEP 2: Get fresh live HTML elements
+                            # STEP 2: Get fresh live HTML elements (the first
+                            # search is reused unless the failed action changed the DOM)
                             html_content = self._get_page_html()
                             if html_content:
-                                relevant_elements = intent_locator.find_elements_outerhtml_with_score_backoff(
-                                    html_or_path=html_content,
-                                    intent_str=step_intent,
-                                    top_k=top_k * 2,
-                                    start=0.5,
-                                    min_floor=0.05,
+                                relevant_elements = self._search_elements(
+                                    html_content, step_intent, top_k * 2, search_cache
                                 )
 
                                 # Log retry elements
@@ -636,6 +816,70 @@ class BasePage:
 
         return result
 
+    def _cached_duo_action(self, prompt: str) -> tuple:
+        """
+        Look up a cached UI_MODULE_ACTION response for prompt.
+
+        The prompt already renders everything the action depends on (module,
+        intent, URL, stored metadata, live elements, previous steps), so its
+        BLAKE2b digest is the key. Entries live duo_cache_ttl seconds
+        (CONFIG["duo_cache_ttl"], 0 disables) and are shared by all pages.
+
+        Returns:
+            tuple: (key or None when disabled, response copy or None)
+        """
+        ttl = self.duo_cache_ttl
+        if not ttl or not prompt:
+            return None, None
+
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+        with BasePage._DUO_CACHE_LOCK:
+            cached = BasePage._DUO_CACHE.get(key)
+            if cached is not None:
+                if time.monotonic() - cached[0] < ttl:
+                    BasePage._DUO_CACHE.move_to_end(key)
+                else:
+                    del BasePage._DUO_CACHE[key]
+                    cached = None
+        return key, copy.deepcopy(cached[1]) if cached is not None else None
+
+    def _remember_duo_action(self, key, response, success: bool):
+        """Cache a response whose action succeeded; drop one that failed."""
+        if key is None:
+            return
+        with BasePage._DUO_CACHE_LOCK:
+            if not success:
+                BasePage._DUO_CACHE.pop(key, None)
+                return
+            BasePage._DUO_CACHE[key] = (time.monotonic(), copy.deepcopy(response))
+            BasePage._DUO_CACHE.move_to_end(key)
+            if len(BasePage._DUO_CACHE) > BasePage._DUO_CACHE_SIZE:
+                BasePage._DUO_CACHE.popitem(last=False)
+
+    def _search_elements(
+        self, html_content: str, step_intent: str, top_k: int, search_cache: dict
+    ) -> list:
+        """
+        Top live-HTML elements for step_intent, memoized in search_cache.
+
+        Keyed by a hash of the HTML, so a changed DOM misses naturally.
+        """
+        html_hash = hashlib.blake2b(
+            html_content.encode("utf-8", "ignore"), digest_size=8
+        ).digest()
+        key = (html_hash, step_intent, top_k)
+        elements = search_cache.get(key)
+        if elements is None:
+            elements = self._intent_locator.find_elements_outerhtml_with_score_backoff(
+                html_or_path=html_content,
+                intent_str=step_intent,
+                top_k=top_k,
+                start=0.5,
+                min_floor=0.05,
+            )
+            search_cache[key] = elements
+        return list(elements)
+
     def _extract_module_from_url(self, url: str) -> str:
         """
         Extract module name from URL path.
@@ -694,11 +938,7 @@ class BasePage:
         logger.log("[ANALYSIS] Requesting failure analysis from GitLab Duo...")
 
         try:
-            page_html_snippet = None
-            try:
-                page_html_snippet = self._get_page_html()[:5000]
-            except:
-                pass
+            page_html_snippet = self._get_page_html_snippet(5000)
 
             # Extract action_json from duo_response for analysis
             action_attempted = (
@@ -766,171 +1006,176 @@ class BasePage:
         Returns list of dicts:
             [{"type": "Given", "intent": "I am on the login page"}, ...]
         """
+        # Fresh dicts per call; the parse itself is cached per intent
+        return [
+            {"type": step_type, "intent": step_text}
+            for step_type, step_text in self._parse_gherkin_cached(intent)
+        ]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _parse_gherkin_cached(intent: str) -> tuple:
+        """Parse intent into ((type, text), ...); identical blocks recur on reruns."""
         steps = []
 
-        # Pattern: Given/When/Then/And followed by step text (case-insensitive)
-        pattern = r"(?i)^\s*(given|when|then|and)\s+(.+)$"
-
-        for line in intent.strip().split("\n"):
+        for line in intent.splitlines():
             line = line.strip()
-            if not line:
+            # Cheap prescreen; the regex only runs on candidate step lines
+            if not line[:5].lower().startswith(BasePage._GHERKIN_PREFIXES):
                 continue
 
-            match = re.match(pattern, line)
+            match = BasePage._GHERKIN_RE.match(line)
             if match:
                 step_type = match.group(
                     1
                 ).capitalize()  # Normalize to Given/When/Then/And
                 step_text = match.group(2).strip()
-                steps.append({"type": step_type, "intent": step_text})
+                steps.append((step_type, step_text))
 
-        return steps
+        return tuple(steps)
 
     def _guess_action_type(self, step_intent: str) -> str:
         """
         Guess the action type from step intent for top_k selection.
         """
-        intent_lower = step_intent.lower()
+        return self._guess_action_type_cached(step_intent.lower())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def _guess_action_type_cached(intent_lower: str) -> str:
+        """Pure function of the lowered step text, so results are cached globally."""
+        # Every keyword start position is found in one scan (the lookahead
+        # lets matches overlap); the earliest category in the table wins
+        matches = BasePage._ACTION_RE.finditer(intent_lower)
+        return min(
+            (match.lastgroup for match in matches),
+            key=BasePage._ACTION_PRIORITY.__getitem__,
+            default="default",
+        )
 
-        if any(
-            kw in intent_lower for kw in ["navigate", "go to", "open", "visit", "am on"]
-        ):
-            return "navigate"
-        elif any(kw in intent_lower for kw in ["click", "press", "tap", "submit"]):
-            return "click"
-        elif any(
-            kw in intent_lower for kw in ["fill", "enter", "type", "input", "write"]
-        ):
-            return "fill"
-        elif any(kw in intent_lower for kw in ["select", "choose", "pick", "dropdown"]):
-            return "select"
-        elif any(
-            kw in intent_lower
-            for kw in [
-                "verify",
-                "assert",
-                "check",
-                "see",
-                "should",
-                "visible",
-                "displayed",
-            ]
-        ):
-            return "verify"
-        elif any(kw in intent_lower for kw in ["wait"]):
-            return "wait"
-        elif any(kw in intent_lower for kw in ["hover"]):
-            return "hover"
-        elif any(
-            kw in intent_lower
-            for kw in [
-                "start capturing",
-                "intercept",
-                "monitor network",
-                "start network",
-                "listen to",
-            ]
-        ):
-            return "network"
-        elif any(
-            kw in intent_lower
-            for kw in [
-                "validate api",
-                "api called",
-                "api returned",
-                "check api",
-                "verify api",
-                "network call",
-            ]
-        ):
-            return "network"
-        elif any(kw in intent_lower for kw in ["stop capturing", "stop network"]):
-            return "network"
+    def _get_page_html(self) -> str:
+        """
+        Get current page HTML content.
 
-        return "default"
+        Serializing the whole DOM over the driver connection is expensive,
+        so the last result is reused while the DOM version is unchanged
+        (e.g. the retry after a failed action on a page that didn't react).
+        The mutation counter is installed by the fetch itself, so pages whose
+        HTML is never read are left untouched.
+        """
+        cached_version, cached_html = self._html_cache
+        if (
+            cached_version is not None
+            and cached_version[0] == self._navigations[0]
+            and self._dom_version() == cached_version
+        ):
+            return cached_html
 
-    def _get_page_html(self) -> str:
-        """Get current page HTML content."""
+        navigations = self._navigations[0]
         try:
-            return self.page.content()
+            dom_version, html = self.page.evaluate(self._CONTENT_WITH_VERSION_JS)
         except Exception as e:
             print(f"Failed to get page HTML: {e}")
             return ""
+        self._html_cache = ((navigations, dom_version), html)
+        return html
+
+    def _get_page_html_snippet(self, max_chars: int = 5000) -> str:
+        """
+        First max_chars of the page HTML, sliced in the page.
+
+        Reuses the cached HTML when the DOM is unchanged; otherwise only the
+        prefix crosses the driver connection instead of the whole document.
+        """
+        cached_version, cached_html = self._html_cache
+        if (
+            cached_version is not None
+            and cached_version[0] == self._navigations[0]
+            and self._dom_version() == cached_version
+        ):
+            return cached_html[:max_chars]
+
+        try:
+            return self.page.evaluate(
+                "n => document.documentElement.outerHTML.slice(0, n)", max_chars
+            )
+        except Exception as e:
+            print(f"Failed to get page HTML snippet: {e}")
+            return ""
+
+    def _wait_for_page_settle(self, timeout: int = 1500):
+        """
+        Wait for the page to settle after a DIRTY action.
+
+        Returns once the document has loaded and the DOM has been quiet for
+        100 ms, instead of always sleeping a fixed 0.5 s. Pages that keep
+        changing are given up on after timeout ms.
+        """
+        try:
+            self.page.wait_for_load_state("load", timeout=timeout)
+            self.page.evaluate(self._DOM_SETTLE_JS, timeout)
+        except PlaywrightTimeoutError:
+            pass
+        except Exception:
+            # A navigation replaced the document mid-wait; wait for the new one
+            try:
+                self.page.wait_for_load_state("load", timeout=timeout)
+            except Exception:
+                pass
+
+    def _dom_version(self):
+        """
+        Token that changes whenever the page DOM may have changed.
+
+        Combines the navigation count with the MutationObserver counter
+        installed by _get_page_html, which also catches SPA re-renders.
+        Returns None when the page can't be queried (e.g. mid-navigation).
+        """
+        navigations = self._navigations[0]
+        try:
+            return (navigations, self.page.evaluate("() => window.__e2eDomVersion"))
+        except Exception:
+            return None
+
+    @classmethod
+    def _navigation_counter(cls, page):
+        """
+        Navigation count of page, as a one-item list updated in place.
+
+        The framenavigated listener is registered once per page, however
+        many BasePage objects are created for it.
+        """
+        counter = cls._NAVIGATION_COUNTS.get(page)
+        if counter is None:
+            counter = cls._NAVIGATION_COUNTS[page] = [0]
+
+            def on_frame_navigated(frame):
+                counter[0] += 1
+
+            page.on("framenavigated", on_frame_navigated)
+        return counter
 
     def _execute_action(self, action: dict, logger: IntentLogger) -> bool:
         """
         Execute a single action on the page.
 
+        Dispatches on action["action"] through _ACTION_HANDLERS. A handler
+        returns None when the action lacks what it needs (e.g. a locator),
+        which is reported like an unknown action type.
+
         Returns True if successful, False otherwise.
         """
         if not action:
             return False
 
         action_type = action.get("action", "")
-        locator = action.get("locator", "")
-        value = action.get("value", "")
+        handler_name = self._ACTION_HANDLERS.get(action_type)
 
         try:
-            if action_type == "navigate":
-                # Check for direct URL first, then page_ref
-                url = action.get("url", "")
-                if not url:
-                    page_ref = action.get("page_ref", "")
-                    url = self._resolve_url(page_ref)
-
-                if url:
-                    self.page.goto(url)
-                    logger.log(f"[EXECUTE] Navigated to {url}")
-                    return True
-                else:
-                    logger.log(
-                        f"[EXECUTE] Could not resolve URL - no url or page_ref provided"
-                    )
-                    return False
-
-            elif action_type == "click":
-                if locator:
-                    self.page.click(locator, timeout=self.timeout)
-                    logger.log(f"[EXECUTE] Clicked {locator}")
-                    return True
-
-            elif action_type == "fill":
-                if locator and value is not None:
-                    self.page.fill(locator, str(value))
-                    logger.log(f"[EXECUTE] Filled {locator} with '{value}'")
-                    return True
-
-            elif action_type == "select":
-                if locator and value:
-                    self.page.select_option(locator, value)
-                    logger.log(f"[EXECUTE] Selected '{value}' in {locator}")
-                    return True
-
-            elif action_type == "verify":
-                return self._execute_verification(action, logger)
-
-            elif action_type == "wait":
-                if locator:
-                    self.page.wait_for_selector(
-                        locator, state="visible", timeout=self.timeout
-                    )
-                    logger.log(f"[EXECUTE] Waited for {locator}")
-                    return True
-
-            elif action_type == "hover":
-                if locator:
-                    self.page.hover(locator)
-                    logger.log(f"[EXECUTE] Hovered over {locator}")
-                    return True
-
-            # Network interception actions
-            elif action_type in [
-                "start_capture",
-                "stop_capture",
-                "validate_api",
-                "clear_capture",
-            ]:
-                return self._execute_network_action(action, logger)
+            if handler_name is not None:
+                result = getattr(self, handler_name)(action, logger)
+                if result is not None:
+                    return result
 
             logger.log(f"[EXECUTE] Unknown action type: {action_type}")
             return False
@@ -942,6 +1187,58 @@ class BasePage:
             logger.log(f"[EXECUTE] Error: {e}")
             return False
 
+    def _do_navigate(self, action: dict, logger: IntentLogger):
+        # Check for direct URL first, then page_ref
+        url = action.get("url", "")
+        if not url:
+            page_ref = action.get("page_ref", "")
+            url = self._resolve_url(page_ref)
+
+        if url:
+            self.page.goto(url)
+            logger.log(f"[EXECUTE] Navigated to {url}")
+            return True
+        else:
+            logger.log(f"[EXECUTE] Could not resolve URL - no url or page_ref provided")
+            return False
+
+    def _do_click(self, action: dict, logger: IntentLogger):
+        locator = action.get("locator", "")
+        if locator:
+            self.page.click(locator, timeout=self.timeout)
+            logger.log(f"[EXECUTE] Clicked {locator}")
+            return True
+
+    def _do_fill(self, action: dict, logger: IntentLogger):
+        locator = action.get("locator", "")
+        value = action.get("value", "")
+        if locator and value is not None:
+            self.page.fill(locator, str(value))
+            logger.log(f"[EXECUTE] Filled {locator} with '{value}'")
+            return True
+
+    def _do_select(self, action: dict, logger: IntentLogger):
+        locator = action.get("locator", "")
+        value = action.get("value", "")
+        if locator and value:
+            self.page.select_option(locator, value)
+            logger.log(f"[EXECUTE] Selected '{value}' in {locator}")
+            return True
+
+    def _do_wait(self, action: dict, logger: IntentLogger):
+        locator = action.get("locator", "")
+        if locator:
+            self.page.wait_for_selector(locator, state="visible", timeout=self.timeout)
+            logger.log(f"[EXECUTE] Waited for {locator}")
+            return True
+
+    def _do_hover(self, action: dict, logger: IntentLogger):
+        locator = action.get("locator", "")
+        if locator:
+            self.page.hover(locator)
+            logger.log(f"[EXECUTE] Hovered over {locator}")
+            return True
+
     def _execute_verification(self, action: dict, logger: IntentLogger) -> bool:
         """
         Execute verification checks.
@@ -1058,109 +1355,258 @@ class BasePage:
         Returns:
             Resolved URL or None
         """
-        urls = getattr(builtins, "URLS", {})
+        url = self._url_index().get(page_ref)
+        if url is not None:
+            return url
 
-        # 1. Try EXACT top-level key match (e.g., "swagger_page")
-        if page_ref in urls:
-            value = urls[page_ref]
-            if isinstance(value, str) and value.startswith(("http://", "https://")):
-                return value
-
-        # 2. Try nested key with dot notation (e.g., "saucedemo.base_url")
-        if "." in page_ref:
-            parts = page_ref.split(".", 1)
-            if len(parts) == 2 and parts[0] in urls:
-                nested = urls[parts[0]]
-                if isinstance(nested, dict) and parts[1] in nested:
-                    value = nested[parts[1]]
-                    if isinstance(value, str) and value.startswith(
-                        ("http://", "https://")
-                    ):
-                        return value
-
-        # 3. Try exact key inside nested dicts (e.g., "base_url" in saucedemo)
-        for site_name, site_urls in urls.items():
-            if isinstance(site_urls, dict) and page_ref in site_urls:
-                value = site_urls[page_ref]
-                if isinstance(value, str) and value.startswith(("http://", "https://")):
-                    return value
-
-        # 4. If it's already a URL, return as-is
+        # If it's already a URL, return as-is
         if page_ref.startswith(("http://", "https://")):
             return page_ref
 
         return None
 
+    def _url_index(self) -> dict:
+        """
+        Flatten builtins.URLS into one page_ref -> URL dict.
+
+        Built once per URLS object (rebuilt if URLS is replaced). Insertion
+        order keeps the lookup precedence of the original nested scan:
+        1. exact top-level key (e.g., "swagger_page")
+        2. dot notation (e.g., "saucedemo.base_url")
+        3. bare key inside a site, first site wins (e.g., "base_url")
+        """
+        urls = getattr(builtins, "URLS", {})
+        indexed_urls, index = BasePage._URL_INDEX
+        if indexed_urls is urls:
+            return index
+
+        def is_url(value):
+            return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+        index = {key: value for key, value in urls.items() if is_url(value)}
+        sites = [
+            (site_name, site_urls)
+            for site_name, site_urls in urls.items()
+            if isinstance(site_urls, dict)
+        ]
+        for site_name, site_urls in sites:
+            for key, value in site_urls.items():
+                if is_url(value):
+                    index.setdefault(f"{site_name}.{key}", value)
+        for site_name, site_urls in sites:
+            for key, value in site_urls.items():
+                if is_url(value):
+                    index.setdefault(key, value)
+
+        BasePage._URL_INDEX = (urls, index)
+        return index
+
     # =========================================================================
     # NETWORK INTERCEPTION METHODS
     # =========================================================================
 
-    def start_network_capture(self, url_pattern: str = "**/*"):
+    def start_network_capture(
+        self,
+        url_pattern="**/*",
+        capture_headers: bool = False,
+        capture_body: bool = False,
+        max_body: int = 50 * 1024,
+        capture_static: bool = False,
+        max_response_body: int = None,
+    ):
         """
         Start capturing network requests and responses.
 
         Args:
-            url_pattern: Glob pattern to filter which URLs to capture.
-                        Examples: "**/api/*", "https://api.example.com/*"
+            url_pattern: Glob pattern, or list of glob patterns, to filter which
+                        URLs to capture; others are dropped in the listeners.
+                        Examples: "**/api/*", ["**/api/login*", "**/api/users*"]
+            capture_headers: Keep request headers (None otherwise)
+            capture_body: Keep request post_data, truncated to max_body chars
+                          (None otherwise)
+            max_body: Maximum post_data characters kept per request
+            capture_static: Also capture images, fonts, stylesheets and media
+            max_response_body: Maximum response body characters kept; bodies
+                               declared larger than this are not read at all
+                               (default: config "max_captured_body_bytes", 1 MiB).
+                               JSON/text bodies are read when captured, other
+                               content types on first access
         """
         if self._network_listener_active:
             return  # Already active
 
-        self._captured_requests = []
-        self._captured_responses = []
+        if max_response_body is None:
+            max_response_body = self.config.get("max_captured_body_bytes", 1024 * 1024)
+
+        self.clear_captured_network()
         self._network_listener_active = True
+        if isinstance(url_pattern, str):
+            url_match = self._url_matcher(url_pattern)
+        else:
+            url_match = self._url_set_matcher(tuple(url_pattern))
+
+        # Bound once for the listeners, which run for every network event.
+        # The deques are only ever cleared in place, so these stay valid
+        append_request = self._captured_requests.append
+        append_request_url = self._captured_request_urls.append
+        append_response = self._captured_responses.append
+        append_response_url = self._captured_response_urls.append
+        static_types = self.STATIC_RESOURCE_TYPES
+        is_text = self._TEXT_CONTENT_TYPE_RE.search
+        url_pool = self._captured_url_pool
+        url_pool_size = self._captured_requests.maxlen or 10_000
+        intern = sys.intern
+        now = time.time
+
+        def share_url(url):
+            """The pooled copy of url (unique URLs must stay collectable)."""
+            shared = url_pool.get(url)
+            if shared is None:
+                if len(url_pool) >= url_pool_size:
+                    url_pool.clear()
+                shared = url_pool[url] = url
+            return shared
 
         def handle_request(request):
             """Capture request details."""
             try:
+                url = request.url
+                if not url_match(url):
+                    return
+                resource_type = request.resource_type
+                if not capture_static and resource_type in static_types:
+                    return
+
                 # Handle post_data - it might be binary
                 post_data = None
-                try:
-                    post_data = request.post_data
-                except:
-                    post_data = "<binary data>"
+                if capture_body:
+                    try:
+                        post_data = request.post_data
+                    except (UnicodeDecodeError, PlaywrightError):
+                        post_data = "<binary data>"
+                    if post_data and len(post_data) > max_body:
+                        post_data = post_data[:max_body]
 
                 request_data = {
-                    "url": request.url,
-                    "method": request.method,
-                    "headers": dict(request.headers),
+                    # Captures repeat the same few URLs/methods, so duplicates
+                    # share one object. Only the method (a small fixed set) is
+                    # interned; it is uppercased so filters compare it as-is
+                    "url": share_url(url),
+                    "method": intern(request.method.upper()),
+                    "headers": dict(request.headers) if capture_headers else None,
                     "post_data": post_data,
-                    "resource_type": request.resource_type,
-                    "timestamp": time.time(),
+                    "resource_type": resource_type,
+                    "timestamp": now(),
                 }
-                self._captured_requests.append(request_data)
+                append_request_url(request_data["url"])
+                append_request(request_data)
             except Exception as e:
-                print(f"Error capturing request: {e}")
+                # Runs on the event dispatch path; only printed at DEBUG
+                if log.is_enabled_for(logging.DEBUG):
+                    log.safe_print("[DEBUG] Error capturing request: %s", e)
 
         def handle_response(response):
             """Capture response details."""
             try:
-                # Try to get response body (may fail for some responses)
-                body = None
-                try:
-                    body = response.text()
-                except:
+                # Filtered URLs and static assets are skipped before the
+                # body is read
+                url = response.url
+                if not url_match(url):
+                    return
+                resource_type = response.request.resource_type
+                if not capture_static and resource_type in static_types:
+                    return
+
+                # Oversized bodies are skipped before they are transferred.
+                # response.headers builds a new dict on every access, so it is
+                # read once and that dict is stored as-is below
+                headers = response.headers
+                content_length = headers.get("content-length", "")
+                too_large = (
+                    content_length.isdigit()
+                    and int(content_length) > max_response_body
+                )
+
+                def read_body():
+                    """Fetch and decode the body."""
+                    if too_large:
+                        return f"<body too large: {content_length} bytes>"
+                    # One transfer; same text as response.text() for valid
+                    # UTF-8, and binary bodies don't raise
                     try:
                         body = response.body().decode("utf-8", errors="ignore")
-                    except:
+                    except PlaywrightError:
                         body = "<binary or unavailable>"
+                    return body[:max_response_body]
 
                 response_data = {
-                    "url": response.url,
+                    "url": share_url(url),
                     "status": response.status,
                     "status_text": response.status_text,
-                    "headers": dict(response.headers),
-                    "body": body,
-                    "timestamp": time.time(),
+                    "headers": headers,
+                    "body": None,
+                    "timestamp": now(),
                 }
-                self._captured_responses.append(response_data)
+                if is_text(headers.get("content-type", "")):
+                    response_data["body"] = read_body()
+                else:
+                    # Filled in by _get_body on first access
+                    response_data["_body_fn"] = read_body
+                append_response_url(response_data["url"])
+                append_response(response_data)
             except Exception as e:
-                print(f"Error capturing response: {e}")
+                # Runs on the event dispatch path; only printed at DEBUG
+                if log.is_enabled_for(logging.DEBUG):
+                    log.safe_print("[DEBUG] Error capturing response: %s", e)
 
         # Attach event listeners
         self.page.on("request", handle_request)
         self.page.on("response", handle_response)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _url_matcher(url_pattern: str):
+        """
+        Compiled glob for url_pattern (fnmatch syntax), as a match callable.
+
+        Results are memoized per URL: captures repeat the same endpoints,
+        so repeated filters and validations only match each distinct URL once.
+        """
+        regex_match = re.compile(fnmatch.translate(url_pattern)).match
+        literal = BasePage._glob_literal(url_pattern)
+
+        @functools.lru_cache(maxsize=4096)
+        def match(url: str) -> bool:
+            # Any matching URL contains the literal, so most misses skip the regex
+            return (not literal or literal in url) and regex_match(url) is not None
+
+        return match
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _url_set_matcher(url_patterns: tuple):
+        """Match callable for URLs matching any of url_patterns (one combined regex)."""
+        regex_match = re.compile(
+            "|".join(fnmatch.translate(pattern) for pattern in url_patterns)
+        ).match
+
+        @functools.lru_cache(maxsize=4096)
+        def match(url: str) -> bool:
+            return regex_match(url) is not None
+
+        return match
+
+    @staticmethod
+    def _glob_literal(url_pattern: str) -> str:
+        """
+        Longest run of plain characters between wildcards in url_pattern,
+        e.g. "/api/login" for "**/api/login*". Empty when the pattern has
+        character classes, whose literal parts aren't simple substrings.
+        """
+        if "[" in url_pattern:
+            return ""
+        return max(re.split(r"[*?]", url_pattern), key=len)
+
     def stop_network_capture(self):
         """Stop capturing network requests."""
         self._network_listener_active = False
@@ -1169,8 +1615,11 @@ class BasePage:
 
     def clear_captured_network(self):
         """Clear all captured network data."""
-        self._captured_requests = []
-        self._captured_responses = []
+        self._captured_requests.clear()
+        self._captured_responses.clear()
+        self._captured_request_urls.clear()
+        self._captured_response_urls.clear()
+        self._captured_url_pool.clear()
 
     def get_captured_requests(
         self, url_pattern: str = None, method: str = None
@@ -1185,18 +1634,16 @@ class BasePage:
         Returns:
             List of matching request dictionaries
         """
-        results = self._captured_requests
-
-        if url_pattern:
-            results = [r for r in results if fnmatch.fnmatch(r["url"], url_pattern)]
-
+        results = self._filter_by_url(
+            self._captured_requests, self._captured_request_urls, url_pattern
+        )
         if method:
-            results = [r for r in results if r["method"].upper() == method.upper()]
-
-        return results
+            method = method.upper()
+            return [r for r in results if r["method"] == method]
+        return list(results)
 
     def get_captured_responses(
-        self, url_pattern: str = None, status: int = None
+        self, url_pattern: str = None, status: int = None, with_body: bool = True
     ) -> list:
         """
         Get captured responses, optionally filtered.
@@ -1204,19 +1651,53 @@ class BasePage:
         Args:
             url_pattern: Glob pattern to filter URLs
             status: HTTP status code to filter
+            with_body: Fill in the "body" of responses whose content type is
+                       read lazily (non-text bodies stay None otherwise)
 
         Returns:
             List of matching response dictionaries
         """
-        results = self._captured_responses
-
-        if url_pattern:
-            results = [r for r in results if fnmatch.fnmatch(r["url"], url_pattern)]
-
+        results = self._filter_by_url(
+            self._captured_responses, self._captured_response_urls, url_pattern
+        )
         if status:
             results = [r for r in results if r["status"] == status]
+        else:
+            results = list(results)
+
+        if with_body:
+            for r in results:
+                self._get_body(r)
+            return results
+        return [self._without_body_fn(r) for r in results]
 
-        return results
+    def _filter_by_url(self, records, urls, url_pattern: str = None):
+        """
+        Iterator over the records whose URL matches url_pattern (all records
+        when no pattern). Matches over the URL column run in C via
+        map/compress, so only surviving records reach Python-level filters.
+        """
+        if not url_pattern:
+            return iter(records)
+        return itertools.compress(records, map(self._url_matcher(url_pattern), urls))
+
+    @staticmethod
+    def _get_body(response_data: dict) -> str:
+        """Body of a captured response, decoded on first access and kept."""
+        body_fn = response_data.pop("_body_fn", None)
+        if body_fn is not None:
+            try:
+                response_data["body"] = body_fn()
+            except Exception:
+                response_data["body"] = "<binary or unavailable>"
+        return response_data["body"]
+
+    @staticmethod
+    def _without_body_fn(response_data: dict) -> dict:
+        """Captured response as handed to callers: never with its body reader."""
+        if "_body_fn" not in response_data:
+            return response_data
+        return {k: v for k, v in response_data.items() if k != "_body_fn"}
 
     def validate_api_called(
         self,
@@ -1263,19 +1744,28 @@ class BasePage:
                 )
                 return result
 
+            # Index the responses for these URLs once (capture order kept)
+            # instead of rescanning the whole buffer for every request
+            responses_by_url = {}
+            for r in self._filter_by_url(
+                self._captured_responses, self._captured_response_urls, url_pattern
+            ):
+                responses, timestamps = responses_by_url.setdefault(
+                    r["url"], ([], [])
+                )
+                responses.append(r)
+                timestamps.append(r["timestamp"])
+
             # Find matching responses
             for req in matching_requests:
-                # Find corresponding response
-                matching_responses = [
-                    r
-                    for r in self._captured_responses
-                    if r["url"] == req["url"] and r["timestamp"] >= req["timestamp"]
-                ]
-
-                if not matching_responses:
+                # First response to this URL captured at or after the request;
+                # timestamps are non-decreasing in capture order
+                responses, timestamps = responses_by_url.get(req["url"], ((), ()))
+                pos = bisect.bisect_left(timestamps, req["timestamp"])
+                if pos == len(responses):
                     continue
 
-                resp = matching_responses[0]  # Get first matching response
+                resp = responses[pos]
 
                 call_data = {
                     "request": req,
@@ -1293,12 +1783,13 @@ class BasePage:
 
                 # Check body contains
                 if expected_body_contains:
-                    body = resp.get("body", "")
+                    body = self._get_body(resp)
                     if expected_body_contains not in str(body):
                         call_data["body_match"] = False
                         call_data["body_error"] = (
                             f"Expected body to contain '{expected_body_contains}'"
                         )
+                call_data["response"] = self._without_body_fn(resp)
 
                 result["matching_calls"].append(call_data)
 
@@ -1306,25 +1797,22 @@ class BasePage:
 
             # Check if all validations passed
             if result["total_matches"] >= min_calls:
-                all_passed = all(
-                    c.get("status_match", True) and c.get("body_match", True)
+                # One pass, in call order: status error, then body error
+                errors = [
+                    error
                     for c in result["matching_calls"]
-                )
-                if all_passed:
-                    result["success"] = True
-                else:
-                    failed_calls = [
-                        c
-                        for c in result["matching_calls"]
-                        if not c.get("status_match") or not c.get("body_match")
-                    ]
-                    errors = []
-                    for fc in failed_calls:
-                        if not fc.get("status_match"):
-                            errors.append(fc.get("status_error", "Status mismatch"))
-                        if not fc.get("body_match"):
-                            errors.append(fc.get("body_error", "Body mismatch"))
+                    for error in (
+                        None
+                        if c["status_match"]
+                        else c.get("status_error", "Status mismatch"),
+                        None if c["body_match"] else c.get("body_error", "Body mismatch"),
+                    )
+                    if error
+                ]
+                if errors:
                     result["error"] = "; ".join(errors)
+                else:
+                    result["success"] = True
             else:
                 result["error"] = (
                     f"Expected at least {min_calls} matching calls, "
@@ -1352,7 +1840,14 @@ class BasePage:
         if action_type == "start_capture":
             # Start network capture
             url_pattern = action.get("url_pattern", "**/*")
-            self.start_network_capture(url_pattern)
+            self.start_network_capture(
+                url_pattern,
+                capture_headers=action.get("capture_headers", False),
+                capture_body=action.get("capture_body", False),
+                max_body=action.get("max_body", 50 * 1024),
+                capture_static=action.get("capture_static", False),
+                max_response_body=action.get("max_response_body"),
+            )
             logger.log(f"[NETWORK] Started capturing network traffic: {url_pattern}")
             return True
 
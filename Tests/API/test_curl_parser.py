@@ -0,0 +1,143 @@
+import pytest
+
+from Logic.API.api_wrapper import APIWrapper
+
+
+@pytest.fixture(scope="module")
+def curl_parser():
+    """
+    Parse a curl command line the way APIWrapper does before sending it.
+
+    _tokenize_curl/_parse_curl use no instance state, so the wrapper is
+    created without __init__ (no session, AI agent or RAG needed).
+    """
+    wrapper = object.__new__(APIWrapper)
+
+    def parse(curl_command):
+        return wrapper._parse_curl(wrapper._tokenize_curl(curl_command))
+
+    return parse
+
+
+class TestCurlParser:
+    @pytest.mark.id("API-CURL-001")
+    @pytest.mark.title("Method, headers and form data")
+    def test_method_headers_and_data(self, curl_parser):
+        args = curl_parser(
+            "curl -s -X PUT 'https://example.com/api/books/1' "
+            "-H 'Authorization: Bearer abc' -d 'title=A' -d 'pages=2'"
+        )
+        assert args == {
+            "method": "PUT",
+            "url": "https://example.com/api/books/1",
+            "headers": {
+                "Authorization": "Bearer abc",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+            "data": b"title=A&pages=2",
+            "auth": None,
+            "allow_redirects": False,
+        }
+
+    @pytest.mark.id("API-CURL-002")
+    @pytest.mark.title("Data defaults to POST; -d strips newlines, --data-raw keeps @")
+    def test_data_and_data_raw(self, curl_parser):
+        args = curl_parser(
+            'curl https://example.com/api/users -H "Content-Type: application/json" '
+            """-d '{"name":\n"x"}'"""
+        )
+        assert args["method"] == "POST"
+        assert args["headers"] == {"Content-Type": "application/json"}
+        assert args["data"] == b'{"name":"x"}'
+
+        args = curl_parser("curl https://example.com/api/notes --data-raw '@alice'")
+        assert args["data"] == b"@alice"
+
+    @pytest.mark.id("API-CURL-003")
+    @pytest.mark.title("--data-urlencode forms")
+    def test_data_urlencode(self, curl_parser):
+        args = curl_parser(
+            "curl https://example.com/api/search "
+            "--data-urlencode 'q=a b&c' --data-urlencode '=x/y' "
+            "--data-urlencode 'plain text'"
+        )
+        assert args["method"] == "POST"
+        assert args["data"] == b"q=a%20b%26c&x%2Fy&plain%20text"
+
+    @pytest.mark.id("API-CURL-004")
+    @pytest.mark.title("--json sets JSON headers without a separator")
+    def test_json(self, curl_parser):
+        args = curl_parser(
+            """curl https://example.com/api/books --json '{"a":1}' -H 'Accept: */*'"""
+        )
+        assert args["method"] == "POST"
+        assert args["headers"] == {
+            "Accept": "*/*",
+            "Content-Type": "application/json",
+        }
+        assert args["data"] == b'{"a":1}'
+
+    @pytest.mark.id("API-CURL-005")
+    @pytest.mark.title("-G moves the data into the query string")
+    def test_get_with_data(self, curl_parser):
+        args = curl_parser(
+            "curl -G https://example.com/api/books?limit=5 -d author=x -d year=2020"
+        )
+        assert args["method"] == "GET"
+        assert args["url"] == "https://example.com/api/books?limit=5&author=x&year=2020"
+        assert args["data"] is None
+
+        args = curl_parser("curl -sG --url example.com/api/books -d id=1")
+        assert args["url"] == "http://example.com/api/books?id=1"
+
+    @pytest.mark.id("API-CURL-006")
+    @pytest.mark.title("Basic auth, cookies, user agent, referer and redirects")
+    def test_auth_cookie_and_flags(self, curl_parser):
+        args = curl_parser(
+            "curl -kL -u admin:se:cret -b 'a=1' --cookie 'b=2' "
+            "-A agent/1.0 -e https://example.com/ https://example.com/api/me"
+        )
+        assert args["auth"] == ("admin", "se:cret")
+        assert args["headers"] == {
+            "Cookie": "a=1; b=2",
+            "User-Agent": "agent/1.0",
+            "Referer": "https://example.com/",
+        }
+        assert args["allow_redirects"] is True
+        assert args["method"] == "GET"
+
+    @pytest.mark.id("API-CURL-007")
+    @pytest.mark.title("-H 'Name:' removes the header like curl")
+    def test_header_removal(self, curl_parser):
+        args = curl_parser(
+            "curl https://example.com/api/books -H 'Accept:' "
+            "-H 'Content-Type:' -d title=A"
+        )
+        # None tells requests to drop the header, session defaults included
+        assert args["headers"] == {"Accept": None, "Content-Type": None}
+        assert args["data"] == b"title=A"
+
+    @pytest.mark.id("API-CURL-008")
+    @pytest.mark.title("Commands the translator can't express fall back to curl")
+    @pytest.mark.parametrize(
+        "curl_command",
+        [
+            "curl https://example.com/api/upload -d @body.json",
+            "curl https://example.com/api/upload --data-binary @body.bin",
+            "curl https://example.com/api/upload --json @body.json",
+            "curl https://example.com/api/search --data-urlencode q@query.txt",
+            "curl https://example.com/api/me -b cookies.txt",
+            "curl https://example.com/api/me -u admin",
+            "curl https://example.com/api/me -H 'X-Empty;'",
+            "curl https://example.com/api/me --max-time 5",
+            "curl -v https://example.com/api/me",
+            "curl https://example.com/api/me -H",
+            "curl https://example.com/a https://example.com/b",
+            "curl -s",
+            "curl https://example.com/api/me | jq .",
+            "curl https://example.com/api/$PATH_PART",
+            "wget https://example.com/api/me",
+        ],
+    )
+    def test_fallback_to_curl(self, curl_parser, curl_command):
+        assert curl_parser(curl_command) is None
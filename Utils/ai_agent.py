@@ -145,6 +145,7 @@ class AIAgent:
                 kwargs.get("relevant_elements"),
                 kwargs.get("previous_steps"),
                 kwargs.get("return_prompt", False),
+                kwargs.get("prompt"),
             )
         elif context == "UI_MODULE_RETRY":
             return self.execute_ui_module_retry_context(
@@ -889,6 +890,7 @@ class AIAgent:
         relevant_elements: list = None,
         previous_steps: list = None,
         return_prompt: bool = False,
+        prompt: str = None,
     ):
         """
         Generate action for a UI step, returning FULL METADATA dict for storage.
@@ -916,19 +918,22 @@ class AIAgent:
             relevant_elements: Fresh HTML elements from IntentLocatorLibrary (optional)
             previous_steps: List of previously executed steps for context
             return_prompt: If True, return the prompt instead of executing
+            prompt: Prompt already built by a return_prompt=True call with the
+                    same arguments; sent as-is instead of being rebuilt
 
         Returns:
             Full metadata dict for storage or prompt string
         """
-        prompt = get_ui_module_action_prompt(
-            step_intent=step_intent,
-            step_type=step_type,
-            module=module,
-            page_url=page_url,
-            stored_metadata=stored_metadata,
-            relevant_elements=relevant_elements or [],
-            previous_steps=previous_steps,
-        )
+        if prompt is None:
+            prompt = get_ui_module_action_prompt(
+                step_intent=step_intent,
+                step_type=step_type,
+                module=module,
+                page_url=page_url,
+                stored_metadata=stored_metadata,
+                relevant_elements=relevant_elements or [],
+                previous_steps=previous_steps,
+            )
 
         if return_prompt:
             return prompt
@@ -6,6 +6,9 @@ Handles all logging with proper Windows encoding support (no Unicode/emoji issue
 import os
 import sys
 import json
+import logging
+import queue
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any
 
@@ -21,6 +24,12 @@ class FrameworkLogger:
     _log_file_path = None
     _session_active = False
 
+    # Verbosity for payload logging (request/response bodies). Set LOG_LEVEL=DEBUG
+    # in the environment to print full payloads instead of truncated previews.
+    _level = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+    if not isinstance(_level, int):
+        _level = logging.INFO
+
     def __init__(self, log_file: Optional[str] = None, console_output: bool = True):
         """
         Initialize the logger.
@@ -37,8 +46,24 @@ class FrameworkLogger:
     # =========================================================================
 
     @staticmethod
-    def safe_print(message: str):
-        """Print message safely, handling Windows encoding issues."""
+    def set_level(level: int):
+        """Set the payload logging level (a ``logging`` level constant)."""
+        FrameworkLogger._level = level
+
+    @staticmethod
+    def is_enabled_for(level: int) -> bool:
+        """Check whether messages at ``level`` would be printed."""
+        return level >= FrameworkLogger._level
+
+    @staticmethod
+    def safe_print(message: str, *args):
+        """
+        Print message safely, handling Windows encoding issues.
+
+        Accepts %-style args so callers can defer formatting of large values.
+        """
+        if args:
+            message = message % args
         try:
             print(message)
         except UnicodeEncodeError:
@@ -191,15 +216,19 @@ class IntentLogger:
     DB_LOG_FILE = os.path.join(LOG_DIR, "db_with_intent_logs.txt")
     UI_LOG_FILE = os.path.join(LOG_DIR, "ui_with_intent_logs.txt")
 
-    def __init__(self, log_file: str = None, test_type: str = "API"):
+    def __init__(
+        self, log_file: str = None, test_type: str = "API", console_output: bool = True
+    ):
         """
         Initialize the intent logger.
 
         Args:
             log_file: Path to log file. If None, uses default based on test_type.
             test_type: Type of test - "API", "DB", or "UI"
+            console_output: Whether to also print to console.
         """
         self.test_type = test_type.upper()
+        self.console_output = console_output
         if log_file is None:
             if self.test_type == "DB":
                 self.log_file = self.DB_LOG_FILE
@@ -210,6 +239,8 @@ class IntentLogger:
         else:
             self.log_file = log_file
         self.file_handle = None
+        self._write_queue = None
+        self._writer = None
         self.session_start = None
         self.test_id = None
         self.test_title = None
@@ -243,6 +274,17 @@ class IntentLogger:
             FrameworkLogger.warning(f"Could not open log file: {e}")
             self.file_handle = None
 
+        # File writes happen on a background thread so log() never blocks
+        if self.file_handle:
+            self._write_queue = queue.SimpleQueue()
+            self._writer = threading.Thread(
+                target=self._drain_writes,
+                args=(self.file_handle, self._write_queue),
+                name="IntentLoggerWriter",
+                daemon=True,
+            )
+            self._writer.start()
+
         # Build header with test ID prominently displayed
         intent_line = f"Intent: {intent}" if intent else ""
 
@@ -284,6 +326,13 @@ Duration: {duration.total_seconds():.2f} seconds
 """
             self.log(footer)
 
+        # Flush everything queued so far before closing the file
+        if self._writer:
+            self._write_queue.put(None)
+            self._writer.join()
+            self._write_queue = None
+            self._writer = None
+
         if self.file_handle:
             try:
                 self.file_handle.close()
@@ -291,23 +340,79 @@ Duration: {duration.total_seconds():.2f} seconds
                 pass
             self.file_handle = None
 
-    def log(self, message: str):
-        """Log a message to both console and file."""
-        # Console output (safe print)
-        try:
-            print(message)
-        except UnicodeEncodeError:
-            safe_msg = message.encode("ascii", errors="replace").decode("ascii")
-            print(safe_msg)
+    def is_enabled(self) -> bool:
+        """Check whether any sink (console or file) will receive messages."""
+        return self.console_output or self.file_handle is not None
 
-        # File output
-        if self.file_handle:
+    def log(self, message: str, *args):
+        """
+        Log a message to both console and file.
+
+        With args, message is a %-format string filled in only when a sink is
+        enabled; dict/list args are rendered with json.dumps at that point.
+        """
+        if args:
+            if not self.is_enabled():
+                return
+            message = message % tuple(
+                json.dumps(arg, default=str) if isinstance(arg, (dict, list)) else arg
+                for arg in args
+            )
+
+        # Console output (safe print)
+        if self.console_output:
+            try:
+                print(message)
+            except UnicodeEncodeError:
+                safe_msg = message.encode("ascii", errors="replace").decode("ascii")
+                print(safe_msg)
+
+        # File output (written by the session's writer thread)
+        if self._write_queue is not None:
+            self._write_queue.put(message)
+        elif self.file_handle:
             try:
                 self.file_handle.write(message + "\n")
                 self.file_handle.flush()
             except Exception as e:
                 pass  # Silently ignore file write errors
 
+    @staticmethod
+    def _drain_writes(file_handle, write_queue, batch_size: int = 64):
+        """
+        Writer thread: append queued messages to the file until a None
+        sentinel arrives, writing up to batch_size messages per write.
+        """
+        while True:
+            batch = [write_queue.get()]
+            while batch[-1] is not None and len(batch) < batch_size:
+                try:
+                    batch.append(write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = batch[-1] is None
+            if done:
+                batch.pop()
+            if batch:
+                try:
+                    file_handle.write("\n".join(batch) + "\n")
+                    file_handle.flush()
+                except Exception:
+                    pass  # Silently ignore file write errors
+            if done:
+                return
+
+    def log_lazy(self, factory):
+        """
+        Log the message returned by factory, building it only if a sink is enabled.
+
+        Args:
+            factory: Zero-argument callable returning the message string
+        """
+        if self.is_enabled():
+            self.log(factory())
+
     def log_step_separator(self):
         """Log a step separator."""
         self.log("\n" + "_" * 80 + "\n")
@@ -342,8 +447,18 @@ Duration: {duration.total_seconds():.2f} seconds
 
         self.log(f"{'-'*80}\n")
 
-    def log_titled_block(self, title: str, content: str, max_chars: int = 3000):
-        """Log a titled block of content."""
+    def log_titled_block(self, title: str, content, max_chars: int = 3000):
+        """
+        Log a titled block of content.
+
+        content may be a string or a zero-argument callable returning one; a
+        callable is only evaluated when a sink is enabled.
+        """
+        if not self.is_enabled():
+            return
+        if callable(content):
+            content = content()
+
         self.log(f"\n--- {title} ---")
 
         if len(content) > max_chars:
@@ -459,8 +574,6 @@ Duration: {duration.total_seconds():.2f} seconds
 
     def log_duo_response(self, response, is_retry: bool = False):
         """Log full response from GitLab Duo. Handles both dict and string responses."""
-        import json
-
         tag = "[DUO RESPONSE RETRY]" if is_retry else "[DUO RESPONSE]"
 
         self.log(f"\n{tag} ═══════════════════════════════════════════════════")
@@ -482,10 +595,7 @@ Duration: {duration.total_seconds():.2f} seconds
             self.log(f"{tag}   locator: {response.get('locator', 'N/A')}")
 
             action_json = response.get("action_json", {})
-            if isinstance(action_json, dict):
-                self.log(f"{tag}   action_json: {json.dumps(action_json)}")
-            else:
-                self.log(f"{tag}   action_json: {action_json}")
+            self.log(f"{tag}   action_json: %s", action_json)
 
             self.log(
                 f"{tag}   playwright_code: {response.get('playwright_code', 'N/A')}"
@@ -2,6 +2,12 @@ import os
 import json
 import builtins
 
+# Optional: orjson is a much faster JSON codec; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def load_test_data(sub_dir):
     """
@@ -21,3 +27,30 @@ def load_test_data(sub_dir):
     except json.JSONDecodeError:
         print(f"Error decoding JSON from: {path}")
         return {}
+
+
+def json_loads(data):
+    """
+    Decode JSON from a str or bytes payload.
+
+    Raises json.JSONDecodeError on invalid input (orjson's error subclasses it).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_pretty(obj) -> str:
+    """
+    Encode an object as 2-space indented JSON text.
+
+    Non-ASCII characters are kept as-is (not \\u-escaped) on both paths.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            pass  # Types orjson can't encode - let stdlib try
+    return json.dumps(obj, indent=2, ensure_ascii=False)
@@ -309,6 +309,7 @@ def api_wrapper(api_context):
 
     yield wrapper
 
+    wrapper.close()
     log.section("FIXTURE: API Wrapper cleanup complete")
 
 